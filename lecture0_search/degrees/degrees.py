@@ -1,7 +1,7 @@
 import csv
+import os
 import sys
-
-from util import Node, StackFrontier, QueueFrontier
+from collections import OrderedDict, deque
 
 # Maps names to a set of corresponding person_ids
 names = {}
@@ -12,6 +12,31 @@ people = {}
 # Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
 movies = {}
 
+# Union-find forest over person_ids: people who are connected by any chain
+# of shared movies end up with the same root
+component_parent = {}
+
+# Number of updates applied since the data was loaded
+generation = 0
+
+# Maps component roots to the generation in which the component last changed
+component_generation = {}
+
+# Paths kept by cached_shortest_path, least recently used dropped first
+PATH_CACHE_SIZE = 10000
+
+# Maps (source, target) to (path, generations of both people's components),
+# least recently used first
+path_cache = OrderedDict()
+
+# Views kept by movie_view, least recently used dropped first. Their keys
+# come from clients, so there could otherwise be any number of them.
+VIEW_CACHE_SIZE = 32
+
+# Maps filter keys to frozensets of the movie_ids they allow, least
+# recently used first. Cleared whenever the data changes.
+views = OrderedDict()
+
 
 def load_data(directory):
     """
@@ -45,11 +70,196 @@ def load_data(directory):
     with open(f"{directory}/stars.csv", encoding="utf-8") as f:
         reader = csv.DictReader(f)
         for row in reader:
-            try:
+            # Skip rows naming a person or movie that was not loaded, without
+            # leaving half of the link behind
+            if row["person_id"] in people and row["movie_id"] in movies:
                 people[row["person_id"]]["movies"].add(row["movie_id"])
                 movies[row["movie_id"]]["stars"].add(row["person_id"])
-            except KeyError:
-                pass
+
+    # Label connected components for instant "Not connected" answers
+    build_components()
+
+
+def update_data(directory):
+    """
+    Applies delta CSV files from a directory to the data in memory.
+
+    Any of people.csv, movies.csv and stars.csv may be present, in the same
+    format as for load_data. Rows for existing ids replace their details,
+    and new star rows add to existing casts. Only components that gain a
+    link are marked changed, so cached paths elsewhere stay valid.
+    """
+    global generation
+    generation += 1
+
+    # Any change may move a movie in or out of a view
+    views.clear()
+
+    # Add or update people
+    if os.path.exists(f"{directory}/people.csv"):
+        with open(f"{directory}/people.csv", encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            for row in reader:
+                person = people.get(row["id"])
+                if person is None:
+                    person = people[row["id"]] = {"movies": set()}
+                    component_parent[row["id"]] = row["id"]
+                    component_generation[row["id"]] = generation
+                else:
+                    # Drop the old name from the index
+                    old = person["name"].lower()
+                    names[old].discard(row["id"])
+                    if not names[old]:
+                        del names[old]
+                person["name"] = row["name"]
+                person["birth"] = row["birth"]
+                names.setdefault(row["name"].lower(), set()).add(row["id"])
+
+    # Add or update movies
+    if os.path.exists(f"{directory}/movies.csv"):
+        with open(f"{directory}/movies.csv", encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            for row in reader:
+                movie = movies.setdefault(row["id"], {"stars": set()})
+                movie["title"] = row["title"]
+                movie["year"] = row["year"]
+
+    # Add stars, joining each new cast member's component with the movie's
+    if os.path.exists(f"{directory}/stars.csv"):
+        with open(f"{directory}/stars.csv", encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            for row in reader:
+                person_id = row["person_id"]
+                movie_id = row["movie_id"]
+                if person_id not in people or movie_id not in movies:
+                    continue
+                stars = movies[movie_id]["stars"]
+                if person_id in stars:
+                    continue
+                if stars:
+                    union_components(next(iter(stars)), person_id)
+                    component_generation[find_component(person_id)] = generation
+                people[person_id]["movies"].add(movie_id)
+                stars.add(person_id)
+
+
+def build_components():
+    """
+    Groups people into connected components, joining everyone who
+    starred in the same movie.
+    """
+    component_parent.clear()
+    component_generation.clear()
+    path_cache.clear()
+    views.clear()
+    for person_id in people:
+        component_parent[person_id] = person_id
+    for movie in movies.values():
+        stars = iter(movie["stars"])
+        first = next(stars, None)
+        for person_id in stars:
+            union_components(first, person_id)
+
+    # Point every person straight at their root, so lookups are O(1)
+    for person_id in component_parent:
+        component_parent[person_id] = find_component(person_id)
+        component_generation[component_parent[person_id]] = generation
+
+
+def find_component(person_id):
+    """
+    Returns the id identifying the connected component of a person.
+    """
+    root = person_id
+    while component_parent[root] != root:
+        root = component_parent[root]
+
+    # Compress the path so later lookups are quicker
+    while component_parent[person_id] != root:
+        component_parent[person_id], person_id = root, component_parent[person_id]
+    return root
+
+
+def union_components(person1, person2):
+    """
+    Merges the connected components of two people.
+    """
+    root1 = find_component(person1)
+    root2 = find_component(person2)
+    if root1 != root2:
+        component_parent[root2] = root1
+
+
+def cached_shortest_path(source, target):
+    """
+    Returns shortest_path(source, target), reusing an earlier answer
+    unless an update has since changed either person's component.
+    At most PATH_CACHE_SIZE paths are kept.
+    """
+    key = (source, target)
+    stamp = (
+        component_generation[find_component(source)],
+        component_generation[find_component(target)],
+    )
+    cached = path_cache.get(key)
+    if cached is not None:
+        if cached[1] == stamp:
+            path_cache.move_to_end(key)
+            return cached[0]
+
+        # Stale, so it can never be used again
+        del path_cache[key]
+    path = shortest_path(source, target)
+    path_cache[key] = (path, stamp)
+    if len(path_cache) > PATH_CACHE_SIZE:
+        path_cache.popitem(last=False)
+    return path
+
+
+def movie_view(min_year=None, max_year=None, min_stars=None, max_stars=None):
+    """
+    Returns the set of movie_ids released between min_year and max_year
+    with between min_stars and max_stars stars, all bounds inclusive and
+    None meaning unbounded. The last VIEW_CACHE_SIZE views are cached
+    until the data is updated.
+    """
+    key = (min_year, max_year, min_stars, max_stars)
+    view = views.get(key)
+    if view is not None:
+        views.move_to_end(key)
+        return view
+
+    allowed = set()
+    for movie_id, movie in movies.items():
+        if min_year is not None or max_year is not None:
+            # Movies without a known year never match a year range
+            try:
+                year = int(movie["year"])
+            except ValueError:
+                continue
+            if min_year is not None and year < min_year:
+                continue
+            if max_year is not None and year > max_year:
+                continue
+        cast = len(movie["stars"])
+        if min_stars is not None and cast < min_stars:
+            continue
+        if max_stars is not None and cast > max_stars:
+            continue
+        allowed.add(movie_id)
+
+    view = frozenset(allowed)
+    views[key] = view
+    if len(views) > VIEW_CACHE_SIZE:
+        views.popitem(last=False)
+    return view
+
+
+def connected(source, target):
+    """
+    Returns True if there is any path between two people.
+    """
+    return find_component(source) == find_component(target)
 
 
 def main():
@@ -84,49 +294,158 @@ def main():
             print(f"{i + 1}: {person1} and {person2} starred in {movie}")
 
 
-def shortest_path(source, target):
+def shortest_path(source, target, view=None):
     """
     Returns the shortest list of (movie_id, person_id) pairs
     that connect the source to the target.
 
+    If view is given, only movies in it (see movie_view) are used.
     If no possible path, returns None.
     """
 
-    # Initialize frontier to just the starting position
-    start_node = Node(state=source, parent=None, action=None)
-    frontier = QueueFrontier()
-    frontier.add(start_node)
+    # People in different components can never be connected, in any view
+    if component_parent and not connected(source, target):
+        return None
+
+    if source == target:
+        return []
+
+    # Breadth-first search over people. Each movie's cast is scanned at most
+    # once per query, since everyone in it is reached at the same depth
+    # through whoever in it is explored first.
+    parents = {source: None}
+    explored_movies = set()
+    frontier = deque([source])
+
+    while frontier:
+        person_id = frontier.popleft()
+        for movie_id, co_star_id in unexplored_neighbors(
+            person_id, explored_movies, view
+        ):
+            if co_star_id in parents:
+                continue
+            parents[co_star_id] = (movie_id, person_id)
 
-    # Initialize an empty explored set
-    explored = set()
+            # Stop as soon as the target shows up in a cast
+            if co_star_id == target:
+                path = []
+                while parents[co_star_id] is not None:
+                    movie_id, previous_id = parents[co_star_id]
+                    path.append((movie_id, co_star_id))
+                    co_star_id = previous_id
+                path.reverse()
+                return path
+            frontier.append(co_star_id)
 
-    # Searching for solution
-    while True:
+    # If nothing left in frontier, no relation between the actors
+    return None
 
-        # If nothing left in frontier, no relation between the actors
-        if frontier.empty():
+
+def shortest_path_layers(source, target, view=None):
+    """
+    Runs a breadth-first search from the source, layer by layer, until the
+    layer holding the target is complete.
+
+    Returns (distance, counts): distance maps every person reached to their
+    number of degrees from the source, and counts maps them to how many
+    distinct shortest lists of (movie_id, person_id) pairs lead to them.
+    Returns None if the target cannot be reached.
+    """
+    if component_parent and not connected(source, target):
+        return None
+
+    distance = {source: 0}
+    counts = {source: 1}
+    layer = [source]
+    depth = 0
+    while target not in distance:
+        if not layer:
             return None
 
-        # Remove the first node from the frontier for exploration
-        current_node = frontier.remove()
-
-        # Checking if we got our target(actor)
-        if current_node.state == target:
-            path = []
-            while current_node.parent is not None:
-                path.append((current_node.action, current_node.state))
-                current_node = current_node.parent
-            path.reverse()
-            return path
-
-        # Mark target(actor) as explored
-        explored.add(current_node.state)
-
-        # Moving to the next node(target_actor) 
-        for movie_id, actor_id in neighbors_for_person(current_node.state):
-            if not frontier.contains_state(actor_id) and actor_id not in explored:
-                new_node = Node(state=actor_id, parent=current_node, action=movie_id)
-                frontier.add(new_node)
+        # Everyone in a movie is within one degree of each other, so a cast
+        # spans at most two layers. Summing the ways into each movie first
+        # means every cast is scanned at most twice.
+        ways = {}
+        for person_id in layer:
+            for movie_id in people[person_id]["movies"]:
+                if view is None or movie_id in view:
+                    ways[movie_id] = ways.get(movie_id, 0) + counts[person_id]
+
+        depth += 1
+        layer = []
+        for movie_id, count in ways.items():
+            for co_star_id in movies[movie_id]["stars"]:
+                if co_star_id not in distance:
+                    distance[co_star_id] = depth
+                    counts[co_star_id] = 0
+                    layer.append(co_star_id)
+                if distance[co_star_id] == depth:
+                    counts[co_star_id] += count
+
+    return distance, counts
+
+
+def count_shortest_paths(source, target, view=None):
+    """
+    Returns the number of distinct shortest paths from the source to the
+    target, as returned by shortest_path, or 0 if they are not connected.
+    """
+    layers = shortest_path_layers(source, target, view)
+    if layers is None:
+        return 0
+    return layers[1][target]
+
+
+def all_shortest_paths(source, target, view=None):
+    """
+    Yields every shortest path from the source to the target, in the same
+    form as shortest_path and in a stable order. Paths are built one at a
+    time by walking back from the target, so only the search's distances
+    are kept in memory. Use itertools.islice to page through them.
+    """
+    layers = shortest_path_layers(source, target, view)
+    if layers is None:
+        return
+    distance = layers[0]
+
+    # Pairs from the target back towards the source, reversed when yielded
+    steps = []
+
+    def walk(person_id):
+        depth = distance[person_id]
+        if depth == 0:
+            yield steps[::-1]
+            return
+
+        # Everyone one degree closer was reached from the source, so every
+        # branch here ends in at least one path
+        for movie_id in sorted(people[person_id]["movies"]):
+            if view is not None and movie_id not in view:
+                continue
+            for previous_id in sorted(movies[movie_id]["stars"]):
+                if distance.get(previous_id) == depth - 1:
+                    steps.append((movie_id, person_id))
+                    yield from walk(previous_id)
+                    steps.pop()
+
+    yield from walk(target)
+
+
+def unexplored_neighbors(person_id, explored_movies, view=None):
+    """
+    Yields (movie_id, person_id) pairs for people who starred with a
+    given person, skipping movies in explored_movies and adding the
+    rest to it as their casts are scanned. If view is given, movies
+    not in it are skipped too.
+    """
+    for movie_id in people[person_id]["movies"]:
+        if movie_id in explored_movies:
+            continue
+        if view is not None and movie_id not in view:
+            continue
+        explored_movies.add(movie_id)
+        for co_star_id in movies[movie_id]["stars"]:
+            yield movie_id, co_star_id
 
 
 def person_id_for_name(name):
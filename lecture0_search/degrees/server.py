@@ -0,0 +1,348 @@
+"""
+Serves degrees queries over TCP, loading the data only once.
+
+Clients send one JSON object per line and get one JSON object back per
+line, tagged with the request's "id" if it had one. Requests on the same
+connection may be answered out of order.
+
+    {"id": 1, "op": "lookup", "name": "Tom Hanks"}
+    {"id": 2, "op": "path", "source": "Tom Hanks", "target": "158"}
+    {"id": 3, "op": "path", "source": "102", "target": "158", "max_year": 1990}
+    {"id": 4, "op": "stats"}
+
+People in "path" requests may be given by IMDB id or by name, and the
+movies used may be limited by year or cast size (see FILTERS). Searches
+run in a pool of worker processes, each of which already holds the data.
+
+Usage: python server.py [directory] [--host HOST] [--port PORT]
+                        [--workers N] [--timeout SECONDS] [--max-pending N]
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import degrees
+
+# Latencies kept per operation for the stats endpoint
+LATENCY_SAMPLES = 10000
+
+OPS = ("lookup", "path", "stats")
+
+# Optional integer bounds of a "path" request, passed on to movie_view
+FILTERS = ("min_year", "max_year", "min_stars", "max_stars")
+
+
+def _init_worker(directory):
+    """Loads the data in a worker, unless it was inherited by fork."""
+    if not degrees.people:
+        degrees.load_data(directory)
+
+
+def _search(source, target, filters):
+    """Runs one search in a worker process, within a movie view if filtered."""
+    if not filters:
+        return degrees.cached_shortest_path(source, target)
+    return degrees.shortest_path(source, target, degrees.movie_view(**filters))
+
+
+def percentile(values, p):
+    """Returns the p-th percentile of values, using the nearest rank."""
+    if not values:
+        return 0
+    values = sorted(values)
+    rank = max(0, min(len(values) - 1, round(p / 100 * len(values)) - 1))
+    return values[rank]
+
+
+class RequestError(Exception):
+    """Raised for a request that cannot be answered; sent back as an error."""
+
+
+class DegreesServer:
+    def __init__(self, make_executor, timeout=10.0, max_pending=64):
+        # The pool is replaced if a worker dies, which breaks it for good
+        self.make_executor = make_executor
+        self.executor = make_executor()
+        self.timeout = timeout
+        self.max_pending = max_pending
+
+        # Searches that have been handed to the pool and not yet finished.
+        # Reading from a connection pauses while max_pending are queued.
+        self.slots = asyncio.Semaphore(max_pending)
+        self.pending = 0
+
+        self.started = time.monotonic()
+        self.connections = 0
+        self.counts = {}
+        self.errors = 0
+        self.timeouts = 0
+        self.latencies = {}
+
+    async def handle_connection(self, reader, writer):
+        self.connections += 1
+        lock = asyncio.Lock()
+        tasks = set()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+
+                # Only searches go to the pool, so only they need a slot
+                try:
+                    request = json.loads(line)
+                except ValueError:
+                    request = None
+                needs_slot = isinstance(request, dict) and request.get("op") == "path"
+                if needs_slot:
+                    await self.slots.acquire()
+
+                task = asyncio.create_task(
+                    self.respond(request, writer, lock, needs_slot)
+                )
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        except ConnectionError:
+            pass
+        finally:
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+            self.connections -= 1
+            writer.close()
+
+    async def respond(self, request, writer, lock, holds_slot):
+        """Answers one request and writes the reply to the connection."""
+        start = time.perf_counter()
+        op = request.get("op") if isinstance(request, dict) else None
+        try:
+            if not isinstance(op, str):
+                raise RequestError("expected a JSON object with an 'op'")
+            elif op == "lookup":
+                response = self.lookup(request)
+            elif op == "path":
+                # The search gives the slot back itself
+                holds_slot = False
+                response = await self.path(request)
+            elif op == "stats":
+                response = self.stats()
+            else:
+                raise RequestError(f"unknown op {op!r}")
+        except RequestError as error:
+            self.errors += 1
+            response = {"error": str(error)}
+        finally:
+            if holds_slot:
+                self.slots.release()
+
+        # Group anything malformed together, so clients cannot grow the stats
+        if op not in OPS:
+            op = "invalid"
+        self.counts[op] = self.counts.get(op, 0) + 1
+        latencies = self.latencies.setdefault(op, deque(maxlen=LATENCY_SAMPLES))
+        latencies.append(time.perf_counter() - start)
+
+        if isinstance(request, dict) and "id" in request:
+            response["id"] = request["id"]
+        async with lock:
+            try:
+                writer.write(json.dumps(response).encode() + b"\n")
+                await writer.drain()
+            except ConnectionError:
+                pass
+
+    def finished(self, future):
+        """Called in the event loop when a search in the pool ends."""
+        self.pending -= 1
+        self.slots.release()
+
+    def replace_executor(self, broken):
+        """Starts a new pool in place of a broken one, if not done already."""
+        if self.executor is broken:
+            broken.shutdown(wait=False)
+            self.executor = self.make_executor()
+
+    def close(self):
+        self.executor.shutdown()
+
+    def person(self, value):
+        """Returns the id of a person given by id or by unambiguous name."""
+        if not isinstance(value, str):
+            raise RequestError("people must be given as strings")
+        if value in degrees.people:
+            return value
+        person_ids = degrees.names.get(value.lower(), set())
+        if not person_ids:
+            raise RequestError(f"person not found: {value!r}")
+        if len(person_ids) > 1:
+            raise RequestError(
+                f"{value!r} is ambiguous, use one of: {', '.join(sorted(person_ids))}"
+            )
+        return next(iter(person_ids))
+
+    def filters(self, request):
+        """Returns the movie view bounds given in a request."""
+        filters = {}
+        for name in FILTERS:
+            value = request.get(name)
+            if value is None:
+                continue
+            if not isinstance(value, int) or isinstance(value, bool):
+                raise RequestError(f"{name} must be an integer")
+            filters[name] = value
+        return filters
+
+    def lookup(self, request):
+        name = request.get("name")
+        if not isinstance(name, str):
+            raise RequestError("lookup needs a 'name'")
+        return {
+            "people": [
+                {"id": person_id, **self.describe(person_id)}
+                for person_id in sorted(degrees.names.get(name.lower(), set()))
+            ]
+        }
+
+    def describe(self, person_id):
+        person = degrees.people[person_id]
+        return {"name": person["name"], "birth": person["birth"]}
+
+    async def path(self, request):
+        """Finds a path, giving back the caller's slot when the search ends."""
+        try:
+            source = self.person(request.get("source"))
+            target = self.person(request.get("target"))
+            filters = self.filters(request)
+        except RequestError:
+            self.slots.release()
+            raise
+
+        # Answer "Not connected" without troubling the pool
+        if not degrees.connected(source, target):
+            self.slots.release()
+            return {"degrees": None, "path": None}
+
+        # A search that has started cannot be stopped, so the slot is only
+        # given back once the worker is done, even if the request timed out
+        loop = asyncio.get_running_loop()
+        executor = self.executor
+        try:
+            future = executor.submit(_search, source, target, filters)
+        except BrokenProcessPool:
+            self.slots.release()
+            self.replace_executor(executor)
+            raise RequestError("search worker died")
+        self.pending += 1
+        future.add_done_callback(
+            lambda future: loop.call_soon_threadsafe(self.finished, future)
+        )
+        try:
+            path = await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise RequestError(f"search timed out after {self.timeout}s")
+        except BrokenProcessPool:
+            self.replace_executor(executor)
+            raise RequestError("search worker died")
+        except Exception as error:
+            raise RequestError(f"search failed: {error!r}")
+
+        if path is None:
+            return {"degrees": None, "path": None}
+        return {
+            "degrees": len(path),
+            "path": [
+                {
+                    "movie": movie_id,
+                    "title": degrees.movies[movie_id]["title"],
+                    "person": person_id,
+                    "name": degrees.people[person_id]["name"],
+                }
+                for movie_id, person_id in path
+            ],
+        }
+
+    def stats(self):
+        return {
+            "uptime": round(time.monotonic() - self.started, 3),
+            "connections": self.connections,
+            "queue_depth": self.pending,
+            "max_pending": self.max_pending,
+            "requests": self.counts,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "latency_ms": {
+                op: {
+                    f"p{p}": round(percentile(values, p) * 1000, 3)
+                    for p in (50, 95, 99)
+                }
+                for op, values in self.latencies.items()
+            },
+        }
+
+
+async def serve(args):
+    # Load the data before starting the pool, so forked workers inherit it
+    print("Loading data...")
+    degrees.load_data(args.directory)
+    print("Data loaded.")
+
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("fork" if "fork" in methods else None)
+
+    def make_executor():
+        return ProcessPoolExecutor(
+            max_workers=args.workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(args.directory,),
+        )
+
+    server = DegreesServer(
+        make_executor, timeout=args.timeout, max_pending=args.max_pending
+    )
+    try:
+        listener = await asyncio.start_server(
+            server.handle_connection, args.host, args.port
+        )
+        for sock in listener.sockets:
+            host, port = sock.getsockname()[:2]
+            print(f"Serving on {host}:{port}")
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        server.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Degrees of separation server")
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument(
+        "--timeout", type=float, default=10.0, help="seconds allowed per search"
+    )
+    parser.add_argument(
+        "--max-pending",
+        type=int,
+        default=64,
+        help="searches queued before reading from clients pauses",
+    )
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+"""
+Monte Carlo Tree Search (UCT) for tic-tac-toe on n x n boards, where
+minimax could never search the whole game.
+
+Positions are kept as a pair of bitmasks, one per player, with cell
+(i, j) at bit i * n + j, so random playouts never build a board.
+"""
+
+import math
+import multiprocessing
+import random
+import time
+
+import tictactoe as ttt
+
+# Index of each player's bitmask
+PLAYERS = (ttt.X, ttt.O)
+
+# Playouts run when neither budget is given
+DEFAULT_ITERATIONS = 10000
+
+
+def cell_lines(size):
+    """
+    Returns, for every cell, the bitmasks of the rows, columns and
+    diagonals through it that a player must fill to win.
+    """
+    cells = range(size)
+    lines = [sum(1 << (i * size + j) for j in cells) for i in cells]
+    lines += [sum(1 << (i * size + j) for i in cells) for j in cells]
+    lines.append(sum(1 << (i * size + i) for i in cells))
+    lines.append(sum(1 << (i * size + size - 1 - i) for i in cells))
+    return [
+        [line for line in lines if line >> cell & 1] for cell in range(size * size)
+    ]
+
+
+def encode(board):
+    """Returns the bitmasks of X's and O's cells on a board."""
+    size = len(board)
+    bits = [0, 0]
+    for i, row in enumerate(board):
+        for j, cell in enumerate(row):
+            if cell != ttt.EMPTY:
+                bits[PLAYERS.index(cell)] |= 1 << (i * size + j)
+    return bits
+
+
+class Node:
+    """A position in the search tree, reached by one player's move."""
+
+    __slots__ = (
+        "move",
+        "parent",
+        "player",
+        "children",
+        "untried",
+        "end",
+        "visits",
+        "wins",
+    )
+
+    def __init__(self, move, parent, player, untried, end=None):
+        self.move = move
+        self.parent = parent
+
+        # Index of the player who made move, and whose wins are counted
+        self.player = player
+        self.children = []
+        self.untried = untried
+
+        # 1 if move won the game, 0.5 if it filled the board, else None
+        self.end = end
+        self.visits = 0
+        self.wins = 0.0
+
+    def select(self, exploration):
+        """Returns the child with the highest upper confidence bound."""
+        log_visits = math.log(self.visits)
+        return max(
+            self.children,
+            key=lambda child: child.wins / child.visits
+            + exploration * math.sqrt(log_visits / child.visits),
+        )
+
+
+class MCTS:
+    """
+    Chooses moves by UCT search within a budget of iterations and/or
+    seconds. The tree below the chosen move is kept, so consecutive calls
+    in the same game start from the statistics already gathered.
+
+    With processes > 1, independent trees are searched in a pool of
+    processes and their root visit counts added up ("root parallel").
+    Call close() to shut the pool down.
+    """
+
+    def __init__(
+        self,
+        iterations=None,
+        time_budget=None,
+        exploration=math.sqrt(2),
+        processes=None,
+        seed=None,
+    ):
+        if iterations is None and time_budget is None:
+            iterations = DEFAULT_ITERATIONS
+        self.iterations = iterations
+        self.time_budget = time_budget
+        self.exploration = exploration
+        self.processes = processes
+        self.random = random.Random(seed)
+        self.pool = None
+
+        # Root of the kept tree, with the bitmasks of its position
+        self.root = None
+        self.bits = None
+        self.size = None
+
+        # Playouts run by the last call, for benchmarks
+        self.playouts = 0
+
+    def search(self, board):
+        """
+        Returns the best action (i, j) for the current player on the
+        board, or None if the game is over.
+        """
+        if ttt.terminal(board):
+            return None
+        size = len(board)
+        bits = encode(board)
+
+        if self.processes is not None and self.processes > 1:
+            move = self.search_parallel(bits, size)
+        else:
+            root = self.reuse(bits, size)
+            self.playouts = self.run(root, bits, size)
+            move = max(root.children, key=lambda child: child.visits).move
+
+            # Keep the subtree of the move about to be made
+            self.advance(root, move)
+        return divmod(move, size)
+
+    def search_parallel(self, bits, size):
+        """Searches independent trees in a pool and adds up their votes."""
+        if self.pool is None:
+            self.pool = multiprocessing.Pool(self.processes)
+        jobs = [
+            (bits, size, self.iterations, self.time_budget, self.exploration, seed)
+            for seed in (self.random.getrandbits(64) for _ in range(self.processes))
+        ]
+        votes = {}
+        self.playouts = 0
+        for visits, playouts in self.pool.starmap(_search_tree, jobs):
+            self.playouts += playouts
+            for move, count in visits.items():
+                votes[move] = votes.get(move, 0) + count
+        return max(sorted(votes), key=votes.get)
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+
+    def reuse(self, bits, size):
+        """
+        Returns the node of the kept tree for the position bits, or a new
+        root if that position is not in the tree.
+        """
+        node = self.root
+        if node is not None and self.size == size:
+            old = self.bits
+            if all(old[p] & ~bits[p] == 0 for p in (0, 1)):
+                new = [bits[0] & ~old[0], bits[1] & ~old[1]]
+
+                # Follow the new moves in turn, starting with the player to move
+                player = 1 - node.player
+                while node is not None and new[player]:
+                    move = (new[player] & -new[player]).bit_length() - 1
+                    new[player] &= new[player] - 1
+                    node = next(
+                        (child for child in node.children if child.move == move), None
+                    )
+                    player = 1 - player
+                if node is not None and not new[0] and not new[1]:
+                    node.parent = None
+                    self.root, self.bits = node, list(bits)
+                    return node
+
+        # X moves first, so if counts are equal the last move was O's
+        last = 1 if bin(bits[0]).count("1") == bin(bits[1]).count("1") else 0
+        self.root = Node(None, None, last, self.empty_cells(bits, size))
+        self.bits = list(bits)
+        self.size = size
+        return self.root
+
+    def advance(self, root, move):
+        """Makes the child for move the root of the kept tree."""
+        child = next(child for child in root.children if child.move == move)
+        child.parent = None
+        self.bits[child.player] |= 1 << move
+        self.root = child
+
+    def empty_cells(self, bits, size):
+        """Returns the empty cells of a position, in random order."""
+        taken = bits[0] | bits[1]
+        cells = [cell for cell in range(size * size) if not taken >> cell & 1]
+        self.random.shuffle(cells)
+        return cells
+
+    def run(self, root, bits, size):
+        """Runs iterations from root until the budget is spent."""
+        lines = cell_lines(size)
+        full = (1 << size * size) - 1
+        deadline = None
+        if self.time_budget is not None:
+            deadline = time.perf_counter() + self.time_budget
+        shuffle = self.random.shuffle
+
+        count = 0
+        while True:
+            node = root
+            state = list(bits)
+
+            # Selection: descend through fully expanded nodes
+            while node.end is None and not node.untried and node.children:
+                node = node.select(self.exploration)
+                state[node.player] |= 1 << node.move
+
+            # Expansion: add one untried move
+            if node.end is None and node.untried:
+                move = node.untried.pop()
+                player = 1 - node.player
+                state[player] |= 1 << move
+                if any(state[player] & line == line for line in lines[move]):
+                    end = 1.0
+                elif state[0] | state[1] == full:
+                    end = 0.5
+                else:
+                    end = None
+                child = Node(move, node, player, self.empty_cells(state, size), end)
+                if end is not None:
+                    child.untried = []
+                node.children.append(child)
+                node = child
+
+            # Simulation: play randomly to the end
+            if node.end is not None:
+                reward = node.end
+            else:
+                cells = node.untried[:]
+                shuffle(cells)
+                player = 1 - node.player
+                reward = 0.5
+                for cell in cells:
+                    state[player] |= 1 << cell
+                    if any(state[player] & line == line for line in lines[cell]):
+                        reward = 1.0 if player == node.player else 0.0
+                        break
+                    player = 1 - player
+
+            # Backpropagation: each node scores from its own mover's side
+            while node is not None:
+                node.visits += 1
+                node.wins += reward
+                reward = 1.0 - reward
+                node = node.parent
+
+            # Always run at least one iteration, so the root has a move
+            count += 1
+            if self.iterations is not None and count >= self.iterations:
+                break
+            if deadline is not None and time.perf_counter() > deadline:
+                break
+        return count
+
+
+def _search_tree(bits, size, iterations, time_budget, exploration, seed):
+    """Searches one tree in a worker; returns its root visits and playouts."""
+    engine = MCTS(iterations, time_budget, exploration, seed=seed)
+    root = engine.reuse(bits, size)
+    playouts = engine.run(root, bits, size)
+    return {child.move: child.visits for child in root.children}, playouts
@@ -3,6 +3,12 @@ import sys
 import time
 
 import tictactoe as ttt
+from mcts import MCTS
+from transposition import TranspositionTable
+
+# Cells per side. Boards bigger than 3x3 are played by Monte Carlo Tree
+# Search, since minimax would never finish on them.
+BOARD_SIZE = 3
 
 pygame.init()
 size = width, height = 600, 400
@@ -15,15 +21,23 @@ screen = pygame.display.set_mode(size)
 
 mediumFont = pygame.font.Font("OpenSans-Regular.ttf", 28)
 largeFont = pygame.font.Font("OpenSans-Regular.ttf", 40)
-moveFont = pygame.font.Font("OpenSans-Regular.ttf", 60)
+
+# Shrink tiles to fit bigger boards between the title and the button
+tile_size = min(80, 270 // BOARD_SIZE)
+moveFont = pygame.font.Font("OpenSans-Regular.ttf", tile_size * 3 // 4)
 
 user = None
-board = ttt.initial_state()
+board = ttt.initial_state(BOARD_SIZE)
 ai_turn = False
+engine = MCTS(time_budget=1.0) if BOARD_SIZE > 3 else None
+
+# Positions searched by minimax, kept between launches
+table = TranspositionTable("tictactoe.db")
 
 while True:
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
+            table.close()
             sys.exit()
 
     screen.fill(black)
@@ -64,12 +78,14 @@ while True:
 
     else:
         # Draw game board
-        tile_size = 80
-        tile_origin = (width / 2 - (1.5 * tile_size), height / 2 - (1.5 * tile_size))
+        tile_origin = (
+            width / 2 - (BOARD_SIZE / 2 * tile_size),
+            height / 2 - (BOARD_SIZE / 2 * tile_size),
+        )
         tiles = []
-        for i in range(3):
+        for i in range(BOARD_SIZE):
             row = []
-            for j in range(3):
+            for j in range(BOARD_SIZE):
                 rect = pygame.Rect(
                     tile_origin[0] + j * tile_size,
                     tile_origin[1] + i * tile_size,
@@ -109,7 +125,10 @@ while True:
         if user != player and not game_over:
             if ai_turn:
                 time.sleep(0.5)
-                move = ttt.minimax(board)
+                if engine is not None:
+                    move = engine.search(board)
+                else:
+                    move = ttt.minimax(board, table)
                 board = ttt.result(board, move)
                 ai_turn = False
             else:
@@ -119,8 +138,8 @@ while True:
         click, _, _ = pygame.mouse.get_pressed()
         if click == 1 and user == player and not game_over:
             mouse = pygame.mouse.get_pos()
-            for i in range(3):
-                for j in range(3):
+            for i in range(BOARD_SIZE):
+                for j in range(BOARD_SIZE):
                     if board[i][j] == ttt.EMPTY and tiles[i][j].collidepoint(mouse):
                         board = ttt.result(board, (i, j))
 
@@ -137,7 +156,8 @@ while True:
                 if againButton.collidepoint(mouse):
                     time.sleep(0.2)
                     user = None
-                    board = ttt.initial_state()
+                    board = ttt.initial_state(BOARD_SIZE)
                     ai_turn = False
+                    engine = MCTS(time_budget=1.0) if BOARD_SIZE > 3 else None
 
     pygame.display.flip()
@@ -11,11 +11,11 @@ O = "O"  # noqa: E741
 EMPTY = None
 
 
-def initial_state():
+def initial_state(size=3):
     """
-    Returns starting state of the board.
+    Returns starting state of a size x size board.
     """
-    return [[EMPTY, EMPTY, EMPTY], [EMPTY, EMPTY, EMPTY], [EMPTY, EMPTY, EMPTY]]
+    return [[EMPTY] * size for _ in range(size)]
 
 
 def player(board):
@@ -61,7 +61,7 @@ def result(board, action):
 
     # 1. Validate the action
     # Validate bounds
-    if not (0 <= row <= 2 and 0 <= col <= 2):
+    if not (0 <= row < len(board) and 0 <= col < len(board)):
         raise ValueError(f"Action {action} is out of bounds.")
 
     # Validate cell is empty
@@ -146,29 +146,53 @@ def utility(board):
     return 0
 
 
-def minimax(board):
+def minimax(board, table=None):
     """
     Returns the optimal action for the current player on the board.
+
+    If a transposition table is given (see transposition.py), positions
+    already in it are not searched again, and every position searched is
+    added to it.
     """
     if terminal(board):
         return None
 
+    # A position searched before already knows its best move
+    if table is not None:
+        entry = table.get(board)
+        if entry is not None:
+            return entry[1]
+
     def get_value(state, is_maximizing) -> Union[float, int]:
         if terminal(state):
             return utility(state)
 
+        if table is not None:
+            entry = table.get(state)
+            if entry is not None:
+                return entry[0]
+
+        state_actions = actions(state)
+        best_state_action = None
         if is_maximizing:
             value = float("-inf")
-            for action in actions(state):
+            for action in state_actions:
                 new_state = result(state, action)
                 score_if_this_action_taken = get_value(new_state, False)
-                value = max(value, score_if_this_action_taken)
+                if score_if_this_action_taken > value:
+                    value = score_if_this_action_taken
+                    best_state_action = action
         else:
             value = float("inf")
-            for action in actions(state):
+            for action in state_actions:
                 new_state = result(state, action)
                 score_if_this_action_taken = get_value(new_state, True)
-                value = min(value, score_if_this_action_taken)
+                if score_if_this_action_taken < value:
+                    value = score_if_this_action_taken
+                    best_state_action = action
+
+        if table is not None:
+            table.put(state, value, best_state_action, len(state_actions))
         return value
 
     current_player = player(board)
@@ -192,4 +216,9 @@ def minimax(board):
             best_value = value
             best_action = action
 
+    # 4. Record the result, and write this search's positions back
+    if table is not None:
+        table.put(board, best_value, best_action, len(actions(board)))
+        table.flush()
+
     return best_action
@@ -0,0 +1,302 @@
+"""
+Plays seeded tic-tac-toe games between AI engines, without pygame, and
+reports how strong and how fast each engine was.
+
+Every ordered pair of different engines plays the given number of games,
+each opening with a few seeded random moves so that deterministic
+engines do not replay the same game. An opening can leave a side lost,
+so even minimax loses some games.
+
+Engines:
+    minimax    tictactoe.minimax
+    table      tictactoe.minimax with a shared transposition table
+    mcts       Monte Carlo Tree Search (mcts.py)
+    heuristic  wins if it can, blocks if it must, else prefers the center
+    random     any legal move
+
+Nodes are the positions minimax creates with result(), or the playouts
+MCTS runs.
+
+Usage: python tournament.py [-n GAMES] [--engines E1,E2,...] [--size N]
+                            [--opening MOVES] [--seed SEED] [--workers N]
+                            [--mcts-iterations N] [--table PATH]
+                            [--json PATH]
+"""
+
+import argparse
+import functools
+import json
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import permutations
+
+import tictactoe as ttt
+from mcts import MCTS
+from transposition import TranspositionTable
+
+ENGINES = ("minimax", "table", "mcts", "heuristic", "random")
+
+# Engines that search the whole game, and so only finish on 3x3 boards
+EXHAUSTIVE = ("minimax", "table")
+
+# Positions created by result() in this process
+nodes = 0
+
+# Transposition tables opened by this process, by path
+tables = {}
+
+
+def counting_result(result):
+    """Wraps result() so that every position it creates is counted."""
+
+    def wrapper(board, action):
+        global nodes
+        nodes += 1
+        return result(board, action)
+
+    return wrapper
+
+
+def _init_worker():
+    ttt.result = counting_result(ttt.result)
+
+
+def heuristic_move(board, rng):
+    """Returns a winning move, else a blocking move, else the best placed."""
+    moves = sorted(ttt.actions(board))
+    me = ttt.player(board)
+    them = ttt.O if me == ttt.X else ttt.X
+    for mark in (me, them):
+        for i, j in moves:
+            board[i][j] = mark
+            won = ttt.winner(board) == mark
+            board[i][j] = ttt.EMPTY
+            if won:
+                return (i, j)
+
+    # Prefer cells on the most lines: the center, then the corners
+    size = len(board)
+
+    def lines(cell):
+        i, j = cell
+        return 2 + (i == j) + (i + j == size - 1)
+
+    best = max(lines(cell) for cell in moves)
+    return rng.choice([cell for cell in moves if lines(cell) == best])
+
+
+def make_engine(name, rng, options):
+    """
+    Returns (choose, searched): choose(board) returns a move, and
+    searched() the nodes searched for the last move, or None if the
+    engine does not search.
+    """
+    if name == "random":
+        return (lambda board: rng.choice(sorted(ttt.actions(board)))), lambda: None
+    if name == "heuristic":
+        return (lambda board: heuristic_move(board, rng)), lambda: None
+    if name == "mcts":
+        engine = MCTS(iterations=options["mcts_iterations"], seed=rng.random())
+        return engine.search, lambda: engine.playouts
+
+    table = None
+    if name == "table":
+        path = options["table"]
+        if path not in tables:
+            tables[path] = TranspositionTable(path)
+        table = tables[path]
+    counted = [0]
+
+    def choose(board):
+        start = nodes
+        move = ttt.minimax(board, table)
+        counted[0] = nodes - start
+        return move
+
+    return choose, lambda: counted[0]
+
+
+def play_game(job, options):
+    """
+    Plays one game for a job (seed, x, o) between engines x and o, seeded
+    so that it can be replayed. Returns a dictionary describing the game.
+    """
+    seed, x, o = job
+    rng = random.Random(seed)
+    players = {
+        ttt.X: (x, *make_engine(x, random.Random(rng.random()), options)),
+        ttt.O: (o, *make_engine(o, random.Random(rng.random()), options)),
+    }
+    board = ttt.initial_state(options["size"])
+
+    # Open with random moves, stopping short of a finished game
+    for _ in range(options["opening"]):
+        move = rng.choice(sorted(ttt.actions(board)))
+        following = ttt.result(board, move)
+        if ttt.terminal(following):
+            break
+        board = following
+
+    moves = []
+    while not ttt.terminal(board):
+        name, choose, searched = players[ttt.player(board)]
+        start = time.perf_counter()
+        move = choose(board)
+        elapsed = time.perf_counter() - start
+        moves.append({"engine": name, "seconds": elapsed, "nodes": searched()})
+        board = ttt.result(board, move)
+
+    return {"seed": seed, "x": x, "o": o, "winner": ttt.winner(board), "moves": moves}
+
+
+def tabulate(games, engines):
+    """Returns the per-engine and per-pairing results of a set of games."""
+    records = {
+        name: {
+            "wins": 0,
+            "draws": 0,
+            "losses": 0,
+            "nodes": 0,
+            "search_seconds": 0.0,
+            "move_seconds": [],
+        }
+        for name in engines
+    }
+    pairings = {}
+    for game in games:
+        x, o, winner = game["x"], game["o"], game["winner"]
+        pairing = pairings.setdefault(
+            (x, o), {"x": x, "o": o, "x_wins": 0, "draws": 0, "o_wins": 0}
+        )
+        if winner is None:
+            pairing["draws"] += 1
+            records[x]["draws"] += 1
+            records[o]["draws"] += 1
+        else:
+            pairing["x_wins" if winner == ttt.X else "o_wins"] += 1
+            records[x]["wins" if winner == ttt.X else "losses"] += 1
+            records[o]["wins" if winner == ttt.O else "losses"] += 1
+        for move in game["moves"]:
+            record = records[move["engine"]]
+            record["move_seconds"].append(move["seconds"])
+            if move["nodes"] is not None:
+                record["nodes"] += move["nodes"]
+                record["search_seconds"] += move["seconds"]
+
+    summary = {}
+    for name, record in records.items():
+        times = sorted(record.pop("move_seconds"))
+        seconds = record.pop("search_seconds")
+        record["moves"] = len(times)
+        record["nodes_per_second"] = record["nodes"] / seconds if seconds else None
+
+        # Move times at the nearest rank to each percentile
+        ranks = {p: round(p / 100 * len(times)) - 1 for p in (50, 95, 99)}
+        record["move_ms"] = {
+            f"p{p}": times[min(max(rank, 0), len(times) - 1)] * 1000 if times else 0
+            for p, rank in ranks.items()
+        }
+        summary[name] = record
+    return summary, list(pairings.values())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless tic-tac-toe tournament")
+    parser.add_argument(
+        "-n", "--games", type=int, default=100, help="games per pairing"
+    )
+    parser.add_argument("--engines", default="table,mcts,heuristic,random")
+    parser.add_argument("--size", type=int, default=3)
+    parser.add_argument(
+        "--opening", type=int, default=2, help="random moves opening each game"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--mcts-iterations", type=int, default=1000)
+    parser.add_argument(
+        "--table", default="tournament.db", help="file shared by 'table' engines"
+    )
+    parser.add_argument(
+        "--json", help="also write results as JSON to this file, or - for stdout"
+    )
+    args = parser.parse_args()
+
+    engines = args.engines.split(",")
+    for name in engines:
+        if name not in ENGINES:
+            parser.error(f"unknown engine {name!r}, choose from {', '.join(ENGINES)}")
+        if name in EXHAUSTIVE and args.size != 3:
+            parser.error(f"{name} only finishes on 3x3 boards")
+    if len(engines) < 2:
+        parser.error("need at least two engines")
+
+    options = {
+        "size": args.size,
+        "opening": args.opening,
+        "mcts_iterations": args.mcts_iterations,
+        "table": args.table,
+    }
+    pairs = list(permutations(engines, 2))
+    jobs = [
+        (args.seed + n * len(pairs) + p, x, o)
+        for n in range(args.games)
+        for p, (x, o) in enumerate(pairs)
+    ]
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(
+        max_workers=args.workers, initializer=_init_worker
+    ) as executor:
+        play = functools.partial(play_game, options=options)
+        games = list(executor.map(play, jobs, chunksize=max(1, len(jobs) // 64)))
+    elapsed = time.perf_counter() - start
+    summary, pairings = tabulate(games, engines)
+
+    out = sys.stderr if args.json == "-" else sys.stdout
+    print(
+        f"{len(games)} games on {args.size}x{args.size} in {elapsed:.1f}s",
+        file=out,
+    )
+    print(
+        f"{'engine':<10} {'W':>6} {'D':>6} {'L':>6} {'nodes/s':>10}"
+        f" {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}",
+        file=out,
+    )
+    for name, record in summary.items():
+        rate = record["nodes_per_second"]
+        rate = "-" if rate is None else f"{rate:.0f}"
+        times = record["move_ms"]
+        print(
+            f"{name:<10} {record['wins']:>6} {record['draws']:>6}"
+            f" {record['losses']:>6} {rate:>10} {times['p50']:>8.2f}"
+            f" {times['p95']:>8.2f} {times['p99']:>8.2f}",
+            file=out,
+        )
+    print(file=out)
+    for pairing in pairings:
+        print(
+            f"{pairing['x']} (X) vs {pairing['o']} (O):"
+            f" X wins {pairing['x_wins']}, draws {pairing['draws']},"
+            f" O wins {pairing['o_wins']}",
+            file=out,
+        )
+
+    if args.json:
+        results = {
+            "config": vars(args),
+            "elapsed": elapsed,
+            "engines": summary,
+            "pairings": pairings,
+        }
+        if args.json == "-":
+            json.dump(results, sys.stdout, indent=2)
+            print()
+        else:
+            with open(args.json, "w") as f:
+                json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
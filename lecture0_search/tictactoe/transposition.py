@@ -0,0 +1,152 @@
+"""
+A transposition table for tic-tac-toe kept in a SQLite file, so that
+positions searched by earlier runs, or by other processes at the same
+time, are never searched again.
+
+Each position stores its minimax value, the best move from it and the
+depth it was searched to. Since the positions nearest the start of the
+game are the most expensive to search, the table doubles as an opening
+book once a game has been played.
+"""
+
+import sqlite3
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS positions (
+    position TEXT PRIMARY KEY,
+    value INTEGER NOT NULL,
+    row INTEGER,
+    col INTEGER,
+    depth INTEGER NOT NULL,
+    written REAL NOT NULL
+) WITHOUT ROWID
+"""
+
+# Keep whichever result was searched deeper
+UPSERT = """
+INSERT INTO positions VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT(position) DO UPDATE SET
+    value = excluded.value,
+    row = excluded.row,
+    col = excluded.col,
+    depth = excluded.depth,
+    written = excluded.written
+WHERE excluded.depth >= positions.depth
+"""
+
+# Shallow positions are the cheapest to search again, so they go first
+EVICT = """
+DELETE FROM positions WHERE position IN (
+    SELECT position FROM positions ORDER BY depth, written LIMIT ?
+)
+"""
+
+
+def position_key(board):
+    """Returns a string naming a board's position, e.g. "X.O/.X./..O"."""
+    return "/".join("".join(cell or "." for cell in row) for row in board)
+
+
+class TranspositionTable:
+    """
+    Positions are read from the file as they are first asked for, and
+    new ones are written back in batches by flush(), dropping the
+    shallowest when the file holds more than max_entries.
+
+    The file is opened in WAL mode, so readers never block, and writers
+    wait up to timeout seconds for each other.
+    """
+
+    def __init__(self, path="tictactoe.db", max_entries=1000000, timeout=10.0):
+        self.path = path
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self.connection = None
+
+        # Maps position keys to (value, move, depth), for positions read
+        # or written by this process, and those still to be written
+        self.entries = {}
+        self.pending = {}
+
+        self.hits = 0
+        self.misses = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def connect(self):
+        """Opens the file the first time it is needed."""
+        if self.connection is None:
+            connection = sqlite3.connect(
+                self.path, timeout=self.timeout, isolation_level=None
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(SCHEMA)
+            self.connection = connection
+        return self.connection
+
+    def get(self, board):
+        """
+        Returns (value, move) for a board, or None if it has not been
+        searched. move is an action (i, j), or None for a finished game.
+        """
+        key = position_key(board)
+        entry = self.entries.get(key)
+        if entry is None:
+            row = (
+                self.connect()
+                .execute(
+                    "SELECT value, row, col, depth FROM positions WHERE position = ?",
+                    (key,),
+                )
+                .fetchone()
+            )
+            if row is None:
+                self.misses += 1
+                return None
+            value, i, j, depth = row
+            entry = (value, None if i is None else (i, j), depth)
+            self.entries[key] = entry
+        self.hits += 1
+        return entry[0], entry[1]
+
+    def put(self, board, value, move, depth):
+        """Records the value and best move of a board, searched to depth."""
+        key = position_key(board)
+        entry = self.entries.get(key)
+        if entry is not None and entry[2] > depth:
+            return
+        self.entries[key] = self.pending[key] = (value, move, depth)
+
+    def flush(self):
+        """Writes new positions to the file in one transaction."""
+        if not self.pending:
+            return
+        now = time.time()
+        rows = [
+            (key, value, *(move if move is not None else (None, None)), depth, now)
+            for key, (value, move, depth) in self.pending.items()
+        ]
+        connection = self.connect()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            connection.executemany(UPSERT, rows)
+            (count,) = connection.execute("SELECT COUNT(*) FROM positions").fetchone()
+            if count > self.max_entries:
+                connection.execute(EVICT, (count - self.max_entries,))
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        self.pending.clear()
+
+    def close(self):
+        self.flush()
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
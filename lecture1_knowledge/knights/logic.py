@@ -1,4 +1,16 @@
+import heapq
+import multiprocessing
+import os
+import re
+import struct
+import sys
+from array import array
+
+
 class Sentence:
+    # No per-instance __dict__, which keeps large knowledge bases small
+    __slots__ = ()
+
     def evaluate(self, model) -> bool:
         """Evaluates the logical sentence."""
         raise Exception("nothing to evaluate")
@@ -43,6 +55,8 @@ class Sentence:
 
 
 class Symbol(Sentence):
+    __slots__ = ("name",)
+
     def __init__(self, name):
         self.name = name
 
@@ -69,6 +83,8 @@ class Symbol(Sentence):
 
 
 class Not(Sentence):
+    __slots__ = ("operand",)
+
     def __init__(self, operand):
         Sentence.validate(operand)
         self.operand = operand
@@ -93,6 +109,8 @@ class Not(Sentence):
 
 
 class And(Sentence):
+    __slots__ = ("conjuncts",)
+
     def __init__(self, *conjuncts):
         for conjunct in conjuncts:
             Sentence.validate(conjunct)
@@ -127,10 +145,12 @@ class And(Sentence):
 
 
 class Or(Sentence):
+    __slots__ = ("disjuncts",)
+
     def __init__(self, *disjuncts):
         for disjunct in disjuncts:
             Sentence.validate(disjunct)
-        self.disjuncts = list(disjuncts)
+        self.disjuncts = tuple(disjuncts)
 
     def __eq__(self, other):
         return isinstance(other, Or) and self.disjuncts == other.disjuncts
@@ -157,6 +177,8 @@ class Or(Sentence):
 
 
 class Implication(Sentence):
+    __slots__ = ("antecedent", "consequent")
+
     def __init__(self, antecedent, consequent):
         Sentence.validate(antecedent)
         Sentence.validate(consequent)
@@ -189,6 +211,8 @@ class Implication(Sentence):
 
 
 class Biconditional(Sentence):
+    __slots__ = ("left", "right")
+
     def __init__(self, left, right):
         Sentence.validate(left)
         Sentence.validate(right)
@@ -214,16 +238,23 @@ class Biconditional(Sentence):
         )
 
     def formula(self):
-        left = Sentence.parenthesize(str(self.left))
-        right = Sentence.parenthesize(str(self.right))
+        left = Sentence.parenthesize(self.left.formula())
+        right = Sentence.parenthesize(self.right.formula())
         return f"{left} <=> {right}"
 
     def symbols(self):
         return set.union(self.left.symbols(), self.right.symbols())
 
 
-def model_check(knowledge, query):
-    """Checks if knowledge base entails query."""
+def model_check(knowledge, query, processes=None):
+    """
+    Checks if knowledge base entails query.
+
+    If processes is given, the truth table is split across that many
+    worker processes (see model_check_parallel).
+    """
+    if processes is not None:
+        return model_check_parallel(knowledge, query, processes)
 
     def check_all(knowledge, query, symbols, model):
         """Checks if knowledge base entails query, given a particular model."""
@@ -257,3 +288,885 @@ def model_check(knowledge, query):
 
     # Check that knowledge entails query
     return check_all(knowledge, query, symbols, dict())
+
+
+# Opcodes for sentences compiled by compile_sentence
+SYMBOL, NOT, AND, OR, IMPLIES, IFF = range(6)
+
+# Number of symbols whose truth values are packed into one integer per pass
+CHUNK_BITS = 16
+
+
+def compile_sentence(sentence, index):
+    """
+    Compiles a sentence into a flat postfix program of integers, with each
+    symbol replaced by its position in index. The program is small to
+    pickle, so it can be sent to worker processes cheaply.
+    """
+    program = array("i")
+
+    def emit(sentence):
+        if isinstance(sentence, Symbol):
+            program.extend((SYMBOL, index[sentence.name]))
+        elif isinstance(sentence, Not):
+            emit(sentence.operand)
+            program.append(NOT)
+        elif isinstance(sentence, And):
+            for conjunct in sentence.conjuncts:
+                emit(conjunct)
+            program.extend((AND, len(sentence.conjuncts)))
+        elif isinstance(sentence, Or):
+            for disjunct in sentence.disjuncts:
+                emit(disjunct)
+            program.extend((OR, len(sentence.disjuncts)))
+        elif isinstance(sentence, Implication):
+            emit(sentence.antecedent)
+            emit(sentence.consequent)
+            program.append(IMPLIES)
+        elif isinstance(sentence, Biconditional):
+            emit(sentence.left)
+            emit(sentence.right)
+            program.append(IFF)
+        else:
+            raise TypeError(f"cannot compile {type(sentence).__name__}")
+
+    emit(sentence)
+    return program
+
+
+def run_program(program, columns, ones):
+    """
+    Evaluates a compiled sentence over many models at once.
+
+    Each entry of columns is an integer whose bits are the truth values of
+    one symbol across the models; ones has a bit set for every model.
+    Returns an integer with a bit set for each model the sentence is true in.
+    """
+    stack = []
+    i = 0
+    while i < len(program):
+        op = program[i]
+        if op == SYMBOL:
+            stack.append(columns[program[i + 1]])
+            i += 2
+            continue
+        if op == AND or op == OR:
+            count = program[i + 1]
+            operands = stack[len(stack) - count:]
+            del stack[len(stack) - count:]
+            value = ones if op == AND else 0
+            for operand in operands:
+                value = value & operand if op == AND else value | operand
+            stack.append(value)
+            i += 2
+            continue
+        if op == NOT:
+            stack.append(ones ^ stack.pop())
+        else:
+            right = stack.pop()
+            left = stack.pop()
+            if op == IMPLIES:
+                stack.append((ones ^ left) | right)
+            else:
+                stack.append(ones ^ (left ^ right))
+        i += 1
+    return stack.pop()
+
+
+def symbol_columns(bits):
+    """
+    Returns one column per symbol enumerating all 2**bits models:
+    bit m of column b is bit b of m.
+    """
+    width = 1 << bits
+    columns = []
+    for b in range(bits):
+        # 2**b false models followed by 2**b true models, repeated
+        pattern = ((1 << (1 << b)) - 1) << (1 << b)
+        span = 2 << b
+        while span < width:
+            pattern |= pattern << span
+            span *= 2
+        columns.append(pattern)
+    return columns
+
+
+# State for model_check_parallel workers, set once per process
+_worker = {}
+
+
+def _init_worker(knowledge, query, num_symbols, prefix_bits, stop):
+    _worker.update(
+        knowledge=knowledge,
+        query=query,
+        num_symbols=num_symbols,
+        prefix_bits=prefix_bits,
+        stop=stop,
+    )
+
+
+def _check_prefix(prefix):
+    """
+    Checks entailment over every model whose first prefix_bits symbols are
+    set from the bits of prefix. Returns False if a counter-model is found.
+    """
+    knowledge = _worker["knowledge"]
+    query = _worker["query"]
+    stop = _worker["stop"]
+    fixed = _worker["prefix_bits"]
+
+    # Split the free symbols into an outer loop and a bit-parallel chunk
+    free = _worker["num_symbols"] - fixed
+    chunk = min(free, CHUNK_BITS)
+    outer = free - chunk
+    ones = (1 << (1 << chunk)) - 1
+    packed = symbol_columns(chunk)
+
+    for rest in range(1 << outer):
+        # Another worker already found a counter-model
+        if stop.is_set():
+            return True
+        columns = [ones if (prefix >> b) & 1 else 0 for b in range(fixed)]
+        columns += [ones if (rest >> b) & 1 else 0 for b in range(outer)]
+        columns += packed
+        models = run_program(knowledge, columns, ones)
+        if models and models & ~run_program(query, columns, ones):
+            return False
+    return True
+
+
+def model_check_parallel(knowledge, query, processes=None, prefix_bits=None):
+    """
+    Checks if knowledge base entails query, splitting the truth table across
+    a pool of processes.
+
+    Fixing the first prefix_bits symbols gives 2**prefix_bits independent
+    parts of the table. Every worker stops as soon as any of them finds a
+    model where knowledge is true and query is false.
+    """
+    symbols = sorted(set.union(knowledge.symbols(), query.symbols()))
+    index = {name: i for i, name in enumerate(symbols)}
+    if processes is None:
+        processes = os.cpu_count() or 1
+    if prefix_bits is None:
+        # A few parts per process keeps the workers evenly loaded
+        prefix_bits = (4 * processes - 1).bit_length() if processes > 1 else 0
+    prefix_bits = min(prefix_bits, len(symbols))
+
+    stop = multiprocessing.Event()
+    initargs = (
+        compile_sentence(knowledge, index),
+        compile_sentence(query, index),
+        len(symbols),
+        prefix_bits,
+        stop,
+    )
+
+    if processes == 1:
+        _init_worker(*initargs)
+        return all(_check_prefix(prefix) for prefix in range(1 << prefix_bits))
+
+    with multiprocessing.Pool(processes, _init_worker, initargs) as pool:
+        for holds in pool.imap_unordered(_check_prefix, range(1 << prefix_bits)):
+            if not holds:
+                stop.set()
+                return False
+    return True
+
+
+def model_check_many(knowledge, queries):
+    """
+    Checks if knowledge base entails each of several queries.
+    Returns a list of booleans, one per query, in the same order.
+    """
+    queries = list(queries)
+
+    def enumerate_models(symbols, model):
+        """Yields every model over symbols in which knowledge is true."""
+
+        # If model has an assignment for each symbol
+        if not symbols:
+            if knowledge.evaluate(model):
+                yield model
+        else:
+            # Choose one of the remaining unused symbols
+            remaining = symbols.copy()
+            p = remaining.pop()
+
+            # Try the symbol both true and false
+            for value in (True, False):
+                extended = model.copy()
+                extended[p] = value
+                yield from enumerate_models(remaining, extended)
+
+    # Get all symbols in knowledge and in every query
+    symbols = set.union(knowledge.symbols(), *[query.symbols() for query in queries])
+
+    # Enumerate the models of knowledge once, then check every query in them
+    entailed = [True] * len(queries)
+    undecided = set(range(len(queries)))
+    for model in enumerate_models(symbols, dict()):
+        for i in list(undecided):
+            if not queries[i].evaluate(model):
+                entailed[i] = False
+                undecided.discard(i)
+        if not undecided:
+            break
+    return entailed
+
+
+class Solver:
+    """
+    Small CDCL SAT solver over integer literals.
+
+    Variables are numbered from 1; literal v means the variable is true and
+    -v means it is false. Clauses learned while solving are kept, so later
+    calls to solve() start from everything earlier calls found out.
+    """
+
+    def __init__(self):
+        self.num_vars = 0
+        self.clauses = []
+        self.learned = set()
+        self.watches = {}
+        self.ok = True
+
+        # Per-variable state, indexed by variable number
+        self.assigns = [0]
+        self.level = [0]
+        self.reason = [None]
+        self.activity = [0.0]
+        self.phase = [False]
+
+        self.trail = []
+        self.trail_lim = []
+        self.qhead = 0
+        self.order = []
+        self.bump_amount = 1.0
+        self.model = None
+
+    def new_var(self):
+        """Adds a fresh variable and returns its number."""
+        self.num_vars += 1
+        self.assigns.append(0)
+        self.level.append(0)
+        self.reason.append(None)
+        self.activity.append(0.0)
+        self.phase.append(False)
+        heapq.heappush(self.order, (0.0, self.num_vars))
+        return self.num_vars
+
+    def value(self, literal):
+        """Returns 1 if literal is true, -1 if false, 0 if unassigned."""
+        value = self.assigns[abs(literal)]
+        return value if literal > 0 else -value
+
+    def decision_level(self):
+        return len(self.trail_lim)
+
+    def add_clause(self, literals):
+        """
+        Adds a clause (an iterable of literals) to the solver.
+        Returns False if the clause set is now known to be unsatisfiable.
+        """
+        if not self.ok:
+            return False
+        self.backtrack(0)
+
+        clause = []
+        for literal in literals:
+            while abs(literal) > self.num_vars:
+                self.new_var()
+            value = self.value(literal)
+            if value == 1 or -literal in clause:
+                # Clause is already satisfied or is a tautology
+                return True
+            if value == 0 and literal not in clause:
+                clause.append(literal)
+
+        if not clause:
+            self.ok = False
+        elif len(clause) == 1:
+            self.enqueue(clause[0], None)
+            if self.propagate() is not None:
+                self.ok = False
+        else:
+            self.attach(clause)
+        return self.ok
+
+    def attach(self, clause):
+        """Stores a clause and watches its first two literals."""
+        index = len(self.clauses)
+        self.clauses.append(clause)
+        self.watches.setdefault(clause[0], []).append(index)
+        self.watches.setdefault(clause[1], []).append(index)
+        return index
+
+    def enqueue(self, literal, reason):
+        variable = abs(literal)
+        self.assigns[variable] = 1 if literal > 0 else -1
+        self.level[variable] = self.decision_level()
+        self.reason[variable] = reason
+        self.trail.append(literal)
+
+    def propagate(self):
+        """
+        Runs unit propagation over the trail.
+        Returns the index of a conflicting clause, or None.
+        """
+        while self.qhead < len(self.trail):
+            false_literal = -self.trail[self.qhead]
+            self.qhead += 1
+            watchers = self.watches.get(false_literal, [])
+            kept = []
+            for position, index in enumerate(watchers):
+                clause = self.clauses[index]
+
+                # Make sure the false literal is the second watch
+                if clause[0] == false_literal:
+                    clause[0], clause[1] = clause[1], clause[0]
+                first = clause[0]
+                if self.value(first) == 1:
+                    kept.append(index)
+                    continue
+
+                # Look for another literal to watch
+                for k in range(2, len(clause)):
+                    if self.value(clause[k]) != -1:
+                        clause[1], clause[k] = clause[k], clause[1]
+                        self.watches.setdefault(clause[1], []).append(index)
+                        break
+                else:
+                    kept.append(index)
+                    if self.value(first) == -1:
+                        kept.extend(watchers[position + 1:])
+                        self.watches[false_literal] = kept
+                        self.qhead = len(self.trail)
+                        return index
+                    self.enqueue(first, index)
+            self.watches[false_literal] = kept
+        return None
+
+    def analyze(self, conflict):
+        """
+        Derives a first-UIP clause from a conflict.
+        Returns the learned clause and the level to backtrack to.
+        """
+        seen = set()
+        learned = [None]
+        counter = 0
+        literal = None
+        clause = self.clauses[conflict]
+        index = len(self.trail) - 1
+        current = self.decision_level()
+
+        while True:
+            for q in clause if literal is None else clause[1:]:
+                variable = abs(q)
+                if variable not in seen and self.level[variable] > 0:
+                    seen.add(variable)
+                    self.bump(variable)
+                    if self.level[variable] == current:
+                        counter += 1
+                    else:
+                        learned.append(q)
+
+            # Walk back along the trail to the next literal involved
+            while abs(self.trail[index]) not in seen:
+                index -= 1
+            literal = self.trail[index]
+            index -= 1
+            counter -= 1
+            if counter == 0:
+                break
+            clause = self.clauses[self.reason[abs(literal)]]
+
+        learned[0] = -literal
+        if len(learned) == 1:
+            return learned, 0
+
+        # Put the literal from the highest remaining level second
+        highest = max(
+            range(1, len(learned)), key=lambda k: self.level[abs(learned[k])]
+        )
+        learned[1], learned[highest] = learned[highest], learned[1]
+        self.bump_amount *= 1.05
+        return learned, self.level[abs(learned[1])]
+
+    def bump(self, variable):
+        self.activity[variable] += self.bump_amount
+        if self.activity[variable] > 1e100:
+            self.activity = [a * 1e-100 for a in self.activity]
+            self.bump_amount *= 1e-100
+            self.order = [(-a, v) for v, a in enumerate(self.activity) if v]
+            heapq.heapify(self.order)
+        elif self.assigns[variable] == 0:
+            heapq.heappush(self.order, (-self.activity[variable], variable))
+
+    def backtrack(self, level):
+        if self.decision_level() <= level:
+            return
+        start = self.trail_lim[level]
+        for literal in self.trail[start:]:
+            variable = abs(literal)
+            self.assigns[variable] = 0
+            self.reason[variable] = None
+            self.phase[variable] = literal > 0
+            heapq.heappush(self.order, (-self.activity[variable], variable))
+        del self.trail[start:]
+        del self.trail_lim[level:]
+        self.qhead = len(self.trail)
+
+    def pick_branch(self):
+        """Returns the unassigned variable with the highest activity, or None."""
+        while self.order:
+            _, variable = heapq.heappop(self.order)
+            if self.assigns[variable] == 0:
+                return variable
+        return None
+
+    def solve(self, assumptions=()):
+        """
+        Returns True if the clauses are satisfiable with every literal in
+        assumptions true. On success the model is left in self.model.
+        """
+        self.model = None
+        if not self.ok:
+            return False
+        for literal in assumptions:
+            while abs(literal) > self.num_vars:
+                self.new_var()
+        self.backtrack(0)
+
+        while True:
+            conflict = self.propagate()
+            if conflict is not None:
+                if self.decision_level() == 0:
+                    self.ok = False
+                    return False
+                learned, level = self.analyze(conflict)
+                self.backtrack(level)
+                if len(learned) == 1:
+                    self.enqueue(learned[0], None)
+                else:
+                    index = self.attach(learned)
+                    self.learned.add(index)
+                    self.enqueue(learned[0], index)
+                continue
+
+            # Decide the assumptions first, one level each
+            if self.decision_level() < len(assumptions):
+                literal = assumptions[self.decision_level()]
+                value = self.value(literal)
+                if value == -1:
+                    self.backtrack(0)
+                    return False
+                self.trail_lim.append(len(self.trail))
+                if value == 0:
+                    self.enqueue(literal, None)
+                continue
+
+            variable = self.pick_branch()
+            if variable is None:
+                self.model = {
+                    v: self.assigns[v] == 1 for v in range(1, self.num_vars + 1)
+                }
+                self.backtrack(0)
+                return True
+            self.trail_lim.append(len(self.trail))
+            self.enqueue(variable if self.phase[variable] else -variable, None)
+
+
+class Tseitin:
+    """
+    Converts sentences to CNF in linear size (Tseitin transformation).
+
+    Every connective is named by a variable, defined by a few clauses to
+    be equivalent to it, instead of distributing ∨ over ∧. Connectives
+    are keyed by their operands' literals, so structurally equal
+    subformulas share one variable wherever they occur. Operands are
+    sorted, so a ∧ b and b ∧ a share one too. ∨ and ⇒ are encoded
+    through ∧, as ¬(¬a ∧ ¬b) and ¬(a ∧ ¬b).
+
+    Clauses are appended to literals, an array of integer literals with
+    each clause terminated by 0. Variables are numbered from 1 and come
+    from new_var(), if given, so they can be shared with a Solver.
+    """
+
+    def __init__(self, new_var=None):
+        # Variables made by next_var, when no new_var is given
+        self.num_vars = 0
+        self.new_var = new_var if new_var is not None else self.next_var
+        self.literals = array("i")
+
+        # Maps symbol names, and connectives keyed by their operands'
+        # literals, to the variables naming them
+        self.variables = {}
+        self.definitions = {}
+
+    def next_var(self):
+        self.num_vars += 1
+        return self.num_vars
+
+    def variable(self, name):
+        """Returns the variable for a symbol name, creating it if needed."""
+        if name not in self.variables:
+            self.variables[name] = self.new_var()
+        return self.variables[name]
+
+    def clause(self, clause):
+        self.literals.extend(clause)
+        self.literals.append(0)
+
+    def conjunction(self, operands):
+        """Returns a literal equivalent to the conjunction of operands."""
+        operands = tuple(sorted(set(operands)))
+        if len(operands) == 1:
+            return operands[0]
+        key = ("and", operands)
+        literal = self.definitions.get(key)
+        if literal is None:
+            literal = self.definitions[key] = self.new_var()
+            for operand in operands:
+                self.clause((-literal, operand))
+            self.clause((literal, *(-operand for operand in operands)))
+        return literal
+
+    def equivalence(self, a, b):
+        """Returns a literal equivalent to a ⇔ b."""
+        # ¬a ⇔ b is ¬(a ⇔ b), so only positive operands need a variable
+        negated = (a < 0) != (b < 0)
+        a, b = sorted((abs(a), abs(b)))
+        key = ("iff", a, b)
+        literal = self.definitions.get(key)
+        if literal is None:
+            literal = self.definitions[key] = self.new_var()
+            self.clause((-literal, -a, b))
+            self.clause((-literal, a, -b))
+            self.clause((literal, a, b))
+            self.clause((literal, -a, -b))
+        return -literal if negated else literal
+
+    def encode(self, sentence, seen=None):
+        """
+        Returns a literal equivalent to sentence, adding definition
+        clauses for any of its connectives not encoded before.
+        """
+        # The same object may appear in many places of one sentence
+        if seen is None:
+            seen = {}
+        if id(sentence) in seen:
+            return seen[id(sentence)]
+
+        if isinstance(sentence, Symbol):
+            literal = self.variable(sentence.name)
+        elif isinstance(sentence, Not):
+            literal = -self.encode(sentence.operand, seen)
+        elif isinstance(sentence, And):
+            literal = self.conjunction(
+                [self.encode(conjunct, seen) for conjunct in sentence.conjuncts]
+            )
+        elif isinstance(sentence, Or):
+            literal = -self.conjunction(
+                [-self.encode(disjunct, seen) for disjunct in sentence.disjuncts]
+            )
+        elif isinstance(sentence, Implication):
+            literal = -self.conjunction(
+                [
+                    self.encode(sentence.antecedent, seen),
+                    -self.encode(sentence.consequent, seen),
+                ]
+            )
+        elif isinstance(sentence, Biconditional):
+            literal = self.equivalence(
+                self.encode(sentence.left, seen), self.encode(sentence.right, seen)
+            )
+        else:
+            raise TypeError(f"cannot encode {type(sentence).__name__}")
+        seen[id(sentence)] = literal
+        return literal
+
+    def add(self, sentence):
+        """Adds clauses asserting that sentence is true."""
+        Sentence.validate(sentence)
+        if isinstance(sentence, And):
+            for conjunct in sentence.conjuncts:
+                self.add(conjunct)
+        elif isinstance(sentence, Or):
+            # A top-level disjunction is already a clause of its operands
+            self.clause(sorted({self.encode(d) for d in sentence.disjuncts}))
+        else:
+            self.clause((self.encode(sentence),))
+
+
+def cnf(*sentences):
+    """
+    Returns (num_vars, variables, literals) for sentences in CNF: the
+    number of variables, a dictionary of symbol names to variables, and
+    the clauses as an array of integer literals, each terminated by 0.
+    """
+    tseitin = Tseitin()
+    for sentence in sentences:
+        tseitin.add(sentence)
+    return tseitin.num_vars, tseitin.variables, tseitin.literals
+
+
+class KnowledgeBase:
+    """
+    Knowledge base that keeps its sentences as CNF clauses in a Solver.
+
+    Sentences can be added one at a time with tell(). Each ask() solves
+    with the negated query as an assumption, so the clause database and
+    everything the solver learned is reused between queries.
+    """
+
+    def __init__(self, *sentences):
+        self.solver = Solver()
+        self.tseitin = Tseitin(self.solver.new_var)
+        self.variables = self.tseitin.variables
+        for sentence in sentences:
+            self.tell(sentence)
+
+    def variable(self, name):
+        """Returns the solver variable for a symbol name, creating it if needed."""
+        return self.tseitin.variable(name)
+
+    def load_clauses(self):
+        """Moves the clauses the encoder has produced into the solver."""
+        literals = self.tseitin.literals
+        start = 0
+        for end, literal in enumerate(literals):
+            if literal == 0:
+                self.solver.add_clause(literals[start:end].tolist())
+                start = end + 1
+        del literals[:]
+
+    def encode(self, sentence):
+        """
+        Returns a literal equivalent to sentence, adding Tseitin definition
+        clauses for each new connective to the solver.
+        """
+        literal = self.tseitin.encode(sentence)
+        self.load_clauses()
+        return literal
+
+    def tell(self, sentence):
+        """Adds a sentence to the knowledge base."""
+        self.tseitin.add(sentence)
+        self.load_clauses()
+
+    def ask(self, query):
+        """Checks if knowledge base entails query."""
+        Sentence.validate(query)
+
+        # Knowledge entails query if knowledge ∧ ¬query has no model
+        return not self.solver.solve([-self.encode(query)])
+
+    def satisfiable(self):
+        """Checks if the knowledge base has at least one model."""
+        return self.solver.solve()
+
+    def clauses(self):
+        """
+        Yields the clauses the knowledge base was told, as lists of literals.
+        Facts already settled by the solver are yielded as unit clauses.
+        """
+        solver = self.solver
+        if not solver.ok:
+            yield []
+            return
+        solver.backtrack(0)
+        for literal in solver.trail:
+            yield [literal]
+        for index, clause in enumerate(solver.clauses):
+            if index not in solver.learned:
+                yield list(clause)
+
+
+# Tokens of the syntax produced by Sentence.formula()
+TOKEN = re.compile(r"\s*(<=>|=>|¬|∧|∨|\(|\)|[^¬∧∨()<=]+)")
+
+
+def parse(text, symbols=None):
+    """
+    Parses a formula written in the syntax of Sentence.formula(),
+    using ¬, ∧, ∨, => and <=> with parentheses for grouping.
+
+    symbols maps names to Symbol objects, so that symbols shared between
+    formulas are only created once.
+    """
+    if symbols is None:
+        symbols = {}
+
+    tokens = []
+    position = 0
+    text = text.strip()
+    while position < len(text):
+        match = TOKEN.match(text, position)
+        if match is None:
+            raise ValueError(f"unexpected {text[position]!r} at {position}")
+        token = match.group(1).strip()
+        if token:
+            tokens.append(token)
+        position = match.end()
+    tokens.append(None)
+    position = 0
+
+    def peek():
+        return tokens[position]
+
+    def take(expected=None):
+        nonlocal position
+        token = tokens[position]
+        if expected is not None and token != expected:
+            raise ValueError(f"expected {expected!r}, got {token!r}")
+        position += 1
+        return token
+
+    def biconditional():
+        sentence = implication()
+        while peek() == "<=>":
+            take()
+            sentence = Biconditional(sentence, implication())
+        return sentence
+
+    def implication():
+        sentence = disjunction()
+        if peek() == "=>":
+            take()
+            return Implication(sentence, implication())
+        return sentence
+
+    def disjunction():
+        disjuncts = [conjunction()]
+        while peek() == "∨":
+            take()
+            disjuncts.append(conjunction())
+        return disjuncts[0] if len(disjuncts) == 1 else Or(*disjuncts)
+
+    def conjunction():
+        conjuncts = [negation()]
+        while peek() == "∧":
+            take()
+            conjuncts.append(negation())
+        return conjuncts[0] if len(conjuncts) == 1 else And(*conjuncts)
+
+    def negation():
+        token = take()
+        if token == "¬":
+            return Not(negation())
+        if token == "(":
+            sentence = biconditional()
+            take(")")
+            return sentence
+        if token is None or token in ("<=>", "=>", "∧", "∨", ")"):
+            raise ValueError(f"unexpected {token!r}")
+        if token not in symbols:
+            symbols[token] = Symbol(token)
+        return symbols[token]
+
+    sentence = biconditional()
+    if peek() is not None:
+        raise ValueError(f"unexpected {peek()!r}")
+    return sentence
+
+
+def write_dimacs(knowledge, f):
+    """
+    Writes a KnowledgeBase to the text file f in DIMACS CNF format.
+    Symbol names are kept in "c symbol" comment lines.
+    """
+    clauses = list(knowledge.clauses())
+    for name, variable in knowledge.variables.items():
+        f.write(f"c symbol {variable} {name}\n")
+    f.write(f"p cnf {knowledge.solver.num_vars} {len(clauses)}\n")
+    for clause in clauses:
+        f.write(" ".join(map(str, clause)) + " 0\n")
+
+
+def read_dimacs(f):
+    """
+    Reads a DIMACS CNF text file into a new KnowledgeBase, streaming
+    clauses straight into the solver without building Sentence objects.
+    """
+    knowledge = KnowledgeBase()
+    clause = []
+    for line in f:
+        if line.startswith("c symbol "):
+            _, _, variable, name = line.rstrip("\n").split(" ", 3)
+            knowledge.variables[name] = int(variable)
+            continue
+        if line.startswith(("c", "p", "%")):
+            continue
+        for literal in map(int, line.split()):
+            if literal == 0:
+                knowledge.solver.add_clause(clause)
+                clause = []
+            else:
+                clause.append(literal)
+    if clause:
+        knowledge.solver.add_clause(clause)
+
+    # Make sure every variable named in the header or comments exists
+    for variable in knowledge.variables.values():
+        while knowledge.solver.num_vars < variable:
+            knowledge.solver.new_var()
+    return knowledge
+
+
+# Header of the binary format: magic, number of variables, symbols, literals
+BINARY_MAGIC = b"LKB1"
+BINARY_HEADER = struct.Struct("<4sIII")
+
+
+def write_binary(knowledge, f):
+    """
+    Writes a KnowledgeBase to the binary file f: a header, the symbol
+    table, then every clause as 32-bit literals terminated by 0.
+    """
+    literals = array("i")
+    for clause in knowledge.clauses():
+        literals.extend(clause)
+        literals.append(0)
+    names = []
+    for name, variable in knowledge.variables.items():
+        encoded = name.encode("utf-8")
+        names.append(struct.pack("<II", variable, len(encoded)) + encoded)
+
+    f.write(
+        BINARY_HEADER.pack(
+            BINARY_MAGIC, knowledge.solver.num_vars, len(names), len(literals)
+        )
+    )
+    f.write(b"".join(names))
+    if sys.byteorder == "big":
+        literals.byteswap()
+    literals.tofile(f)
+
+
+def read_binary(f):
+    """Reads a file written by write_binary into a new KnowledgeBase."""
+    magic, num_vars, num_names, num_literals = BINARY_HEADER.unpack(
+        f.read(BINARY_HEADER.size)
+    )
+    if magic != BINARY_MAGIC:
+        raise ValueError("not a knowledge base file")
+
+    knowledge = KnowledgeBase()
+    for _ in range(num_names):
+        variable, length = struct.unpack("<II", f.read(8))
+        knowledge.variables[f.read(length).decode("utf-8")] = variable
+    while knowledge.solver.num_vars < num_vars:
+        knowledge.solver.new_var()
+
+    # Load all literals in one read, then hand them to the solver clause by clause
+    literals = array("i")
+    literals.fromfile(f, num_literals)
+    if sys.byteorder == "big":
+        literals.byteswap()
+    start = 0
+    for end, literal in enumerate(literals):
+        if literal == 0:
+            knowledge.solver.add_clause(literals[start:end])
+            start = end + 1
+    return knowledge
@@ -0,0 +1,82 @@
+"""
+Compares the memory used by a large knowledge base built from the
+__slots__ sentence classes in logic.py against the same knowledge base
+built from equivalent classes that carry a per-instance __dict__.
+
+Usage: python memory_benchmark.py [number of clauses]
+"""
+
+import random
+import sys
+import tracemalloc
+
+import logic
+
+
+# Subclasses without __slots__ get a __dict__ again, like the old classes
+class DictSymbol(logic.Symbol):
+    pass
+
+
+class DictNot(logic.Not):
+    pass
+
+
+class DictAnd(logic.And):
+    pass
+
+
+class DictOr(logic.Or):
+    def __init__(self, *disjuncts):
+        super().__init__(*disjuncts)
+        self.disjuncts = list(disjuncts)
+
+
+class DictImplication(logic.Implication):
+    pass
+
+
+SLOTS = (logic.Symbol, logic.Not, logic.And, logic.Or, logic.Implication)
+DICTS = (DictSymbol, DictNot, DictAnd, DictOr, DictImplication)
+
+
+def build(classes, clauses, seed=0):
+    """
+    Builds a random knowledge base of implications between disjunctions,
+    the shape of the statements in puzzle.py.
+    """
+    Symbol, Not, And, Or, Implication = classes
+    rng = random.Random(seed)
+    symbols = [Symbol(f"S{i}") for i in range(clauses // 4 + 1)]
+    knowledge = And()
+    for _ in range(clauses):
+        a, b, c = rng.sample(symbols, 3)
+        knowledge.add(Implication(Not(a), Or(b, Not(c))))
+    return knowledge
+
+
+def measure(classes, clauses):
+    """Returns the bytes allocated while building the knowledge base."""
+    tracemalloc.start()
+    knowledge = build(classes, clauses)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del knowledge
+    return size
+
+
+def main():
+    if len(sys.argv) > 2:
+        sys.exit("Usage: python memory_benchmark.py [number of clauses]")
+    clauses = int(sys.argv[1]) if len(sys.argv) == 2 else 100000
+
+    with_dict = measure(DICTS, clauses)
+    with_slots = measure(SLOTS, clauses)
+    print(f"{clauses} clauses")
+    print(f"    __dict__ nodes:  {with_dict / 2**20:6.1f} MiB")
+    print(f"    __slots__ nodes: {with_slots / 2**20:6.1f} MiB")
+    print(f"    reduction: {1 - with_slots / with_dict:.0%}")
+
+
+if __name__ == "__main__":
+    main()
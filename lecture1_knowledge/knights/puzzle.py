@@ -1,4 +1,12 @@
-from logic import Symbol, And, Or, Not, Implication, Biconditional, model_check
+from logic import (
+    Symbol,
+    And,
+    Or,
+    Not,
+    Implication,
+    Biconditional,
+    KnowledgeBase,
+)
 
 AKnight = Symbol("A is a Knight")
 AKnave = Symbol("A is a Knave")
@@ -181,8 +189,10 @@ def main():
         if len(knowledge.conjuncts) == 0:
             print("    Not yet implemented.")
         else:
+            # Encode the puzzle once and reuse it for every symbol
+            kb = KnowledgeBase(knowledge)
             for symbol in symbols:
-                if model_check(knowledge, symbol):
+                if kb.ask(symbol):
                     print(f"    {symbol}")
 
 
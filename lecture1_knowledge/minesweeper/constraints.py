@@ -0,0 +1,159 @@
+"""
+Reasoning over groups of Minesweeper sentences that share cells.
+
+Sentences that share no cells, directly or through other sentences, are
+independent, so each connected group ("component") can be solved on its
+own by enumerating every consistent placement of mines.
+"""
+
+import time
+
+# Solved components, keyed by their constraints
+_cache = {}
+CACHE_SIZE = 4096
+
+
+class Timeout(Exception):
+    """Raised when solving a component runs past its deadline."""
+
+
+def components(sentences):
+    """
+    Splits sentences into groups connected by shared cells.
+    Returns a list of lists of sentences.
+
+    Cells are compared by the sentences' members(), so bitmask sentences
+    are never decoded into cells here.
+    """
+    parent = {}
+
+    def find(cell):
+        while parent[cell] != cell:
+            parent[cell] = parent[parent[cell]]
+            cell = parent[cell]
+        return cell
+
+    # Join every cell of a sentence with its first cell
+    sentences = [sentence for sentence in sentences if len(sentence)]
+    for sentence in sentences:
+        cells = iter(sentence.members())
+        first = next(cells)
+        parent.setdefault(first, first)
+        for cell in cells:
+            parent.setdefault(cell, cell)
+            parent[find(cell)] = find(first)
+
+    groups = {}
+    for sentence in sentences:
+        root = find(next(iter(sentence.members())))
+        groups.setdefault(root, []).append(sentence)
+    return list(groups.values())
+
+
+def signature(sentences):
+    """Returns a hashable key describing the constraints of a component."""
+    return frozenset(sentence.key() for sentence in sentences)
+
+
+def solve(sentences, deadline=None):
+    """
+    Enumerates every placement of mines in the cells of a component that
+    agrees with all of its sentences.
+
+    Returns (cells, solutions), where cells is a tuple of the component's
+    cells and solutions maps each possible number of mines k to a pair
+    (ways, counts): how many placements use k mines, and for each cell
+    (in the order of cells) in how many of those placements it is a mine.
+
+    Raises Timeout if time.perf_counter() passes deadline. Results are
+    cached by the component's constraints.
+    """
+    key = signature(sentences)
+    if key in _cache:
+        return _cache[key]
+
+    constraints = [(tuple(sentence.cells), sentence.count) for sentence in sentences]
+
+    # Assign the most constrained cells first, so contradictions show early
+    occurrences = {}
+    for cells, _ in constraints:
+        for cell in cells:
+            occurrences[cell] = occurrences.get(cell, 0) + 1
+    cells = tuple(sorted(occurrences, key=lambda cell: (-occurrences[cell], cell)))
+    position = {cell: i for i, cell in enumerate(cells)}
+
+    # For each cell, the constraints it appears in
+    watching = [[] for _ in cells]
+    for c, (members, _) in enumerate(constraints):
+        for cell in members:
+            watching[position[cell]].append(c)
+
+    # Mines still needed and cells still unassigned, per constraint
+    needed = [count for _, count in constraints]
+    unassigned = [len(members) for members, _ in constraints]
+
+    # Depth-first search over cells in order, kept on an explicit stack
+    # (assignment, with -1 for cells not yet assigned) rather than by
+    # recursion, so components of any size stay within Python's limits
+    solutions = {}
+    assignment = [-1] * len(cells)
+    i = 0
+    mines = 0
+    nodes = 0
+    while i >= 0:
+        nodes += 1
+        if deadline is not None and nodes % 1024 == 0:
+            if time.perf_counter() > deadline:
+                raise Timeout()
+
+        if i == len(cells):
+            if mines not in solutions:
+                solutions[mines] = [0, [0] * len(cells)]
+            solutions[mines][0] += 1
+            counts = solutions[mines][1]
+            for j, value in enumerate(assignment):
+                counts[j] += value
+            i -= 1
+            continue
+
+        # Take back this cell's last value, and backtrack if it was 1
+        watched = watching[i]
+        value = assignment[i]
+        if value >= 0:
+            for c in watched:
+                needed[c] += value
+                unassigned[c] += 1
+            if value == 1:
+                mines -= 1
+                assignment[i] = -1
+                i -= 1
+                continue
+
+        # Try the next value, and 1 as well if 0 breaks a constraint
+        value += 1
+        while True:
+            consistent = True
+            for c in watched:
+                needed[c] -= value
+                unassigned[c] -= 1
+                if not 0 <= needed[c] <= unassigned[c]:
+                    consistent = False
+            if consistent:
+                assignment[i] = value
+                mines += value
+                i += 1
+                break
+            for c in watched:
+                needed[c] += value
+                unassigned[c] += 1
+            if value == 1:
+                assignment[i] = -1
+                i -= 1
+                break
+            value = 1
+
+    result = (cells, {k: (ways, counts) for k, (ways, counts) in solutions.items()})
+    if len(_cache) >= CACHE_SIZE:
+        _cache.clear()
+    _cache[key] = result
+    return result
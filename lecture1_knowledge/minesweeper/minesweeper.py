@@ -1,5 +1,10 @@
 import itertools
+import math
 import random
+import time
+from collections import deque
+
+import constraints
 
 
 class Minesweeper:
@@ -81,6 +86,86 @@ class Minesweeper:
         """
         return self.mines_found == self.mines
 
+    def reveal(self, cell, revealed=()):
+        """
+        Reveals a safe cell, and if it has no neighboring mines, keeps
+        revealing the whole connected region of such cells and its border.
+        Cells in revealed are left alone.
+
+        Returns a list of (cell, count) pairs for every cell revealed.
+        """
+        opened = {cell}
+        observations = []
+        queue = deque([cell])
+        while queue:
+            current = queue.popleft()
+            count = self.nearby_mines(current)
+            observations.append((current, count))
+            if count:
+                continue
+
+            # No mines around, so every neighbor is safe to open too
+            for i in range(current[0] - 1, current[0] + 2):
+                for j in range(current[1] - 1, current[1] + 2):
+                    neighbor = (i, j)
+                    if (
+                        0 <= i < self.height
+                        and 0 <= j < self.width
+                        and neighbor not in opened
+                        and neighbor not in revealed
+                    ):
+                        opened.add(neighbor)
+                        queue.append(neighbor)
+        return observations
+
+
+class ArrayMinesweeper(Minesweeper):
+    """
+    Minesweeper game backed by NumPy arrays, for large boards.
+
+    Mines are placed by sampling cells without replacement, and every
+    cell's neighbor count is computed once up front, so nearby_mines is
+    a lookup. NumPy is only needed by this class, so it is imported here.
+    """
+
+    def __init__(self, height=8, width=8, mines=8):
+        import numpy as np
+
+        self.height = height
+        self.width = width
+
+        # Draw the generator's seed from random, so random.seed() still
+        # decides the board
+        rng = np.random.default_rng(random.getrandbits(64))
+        positions = rng.choice(height * width, size=mines, replace=False)
+        self.board = np.zeros(height * width, dtype=bool)
+        self.board[positions] = True
+        self.board = self.board.reshape(height, width)
+        self.mines = {divmod(int(position), width) for position in positions}
+
+        # Count mines in each 3x3 neighborhood by adding up the nine shifted
+        # copies of the zero-padded board, then leave out the cell itself
+        padded = np.pad(self.board, 1).astype(np.uint8)
+        counts = np.zeros((height, width), dtype=np.uint8)
+        for di in range(3):
+            for dj in range(3):
+                counts += padded[di : di + height, dj : dj + width]
+        self.counts = counts - self.board
+
+        # At first, player has found no mines
+        self.mines_found = set()
+
+    def is_mine(self, cell):
+        return bool(self.board[cell])
+
+    def nearby_mines(self, cell):
+        """
+        Returns the number of mines that are
+        within one row and column of a given cell,
+        not including the cell itself.
+        """
+        return int(self.counts[cell])
+
 
 class Sentence:
     """
@@ -103,6 +188,28 @@ class Sentence:
     def __str__(self):
         return f"{self.cells} = {self.count}"
 
+    def __len__(self):
+        return len(self.cells)
+
+    def key(self):
+        """Returns a hashable value identifying the sentence's content."""
+        return (frozenset(self.cells), self.count)
+
+    def members(self):
+        """Returns the keys under which Knowledge indexes the sentence's cells."""
+        return self.cells
+
+    def issubset(self, other):
+        """Checks if every cell of this sentence is also in other."""
+        return self.cells.issubset(other.cells)
+
+    def difference(self, other):
+        """
+        Returns the sentence about the cells of this sentence that are
+        not in other, assuming other's cells are a subset of these.
+        """
+        return Sentence(self.cells - other.cells, self.count - other.count)
+
     def known_mines(self):
         """
         Returns the set of all cells in self.cells known to be mines.
@@ -143,16 +250,314 @@ class Sentence:
             pass
 
 
+class BitSentence:
+    """
+    Sentence whose cells are stored as bits of an integer, for large boards.
+
+    Cell (i, j) is bit i * width + j of the flattened board. The mask is
+    kept shifted down to its lowest cell, with that cell's index stored in
+    offset, so a sentence costs a few hundred bits however far down the
+    board it is. Subset, difference, equality and hashing are each a
+    handful of integer operations.
+    """
+
+    __slots__ = ("offset", "mask", "count", "width")
+
+    def __init__(self, cells, count, width):
+        self.width = width
+        self.count = count
+        mask = 0
+        for i, j in cells:
+            mask |= 1 << (i * width + j)
+        self.offset = 0
+        self.mask = mask
+        self.normalize()
+
+    @classmethod
+    def from_mask(cls, offset, mask, count, width):
+        sentence = cls((), count, width)
+        sentence.offset = offset
+        sentence.mask = mask
+        sentence.normalize()
+        return sentence
+
+    def normalize(self):
+        """Shifts the mask so that its lowest set bit is bit 0."""
+        if self.mask:
+            shift = (self.mask & -self.mask).bit_length() - 1
+            self.mask >>= shift
+            self.offset += shift
+        else:
+            self.offset = 0
+
+    @property
+    def cells(self):
+        """Decodes the mask into a new set of cells; see members() for speed."""
+        cells = set()
+        mask = self.mask
+        while mask:
+            low = mask & -mask
+            cells.add(divmod(self.offset + low.bit_length() - 1, self.width))
+            mask ^= low
+        return cells
+
+    def __eq__(self, other):
+        return self.key() == other.key()
+
+    def __hash__(self):
+        return hash(self.key())
+
+    def __str__(self):
+        return f"{self.cells} = {self.count}"
+
+    def __len__(self):
+        return self.mask.bit_count()
+
+    def key(self):
+        """
+        Returns a hashable value identifying the sentence's content. The
+        width is included, since the same bits name different cells on
+        boards of different widths.
+        """
+        return (self.width, self.offset, self.mask, self.count)
+
+    def members(self):
+        """
+        Yields the flat index (i * width + j) of each cell, straight from
+        the mask, without building cell tuples.
+        """
+        mask = self.mask
+        offset = self.offset
+        while mask:
+            low = mask & -mask
+            yield offset + low.bit_length() - 1
+            mask ^= low
+
+    def aligned(self, other):
+        """Returns both masks shifted to a common lowest offset."""
+        base = min(self.offset, other.offset)
+        return (
+            self.mask << (self.offset - base),
+            other.mask << (other.offset - base),
+            base,
+        )
+
+    def issubset(self, other):
+        """Checks if every cell of this sentence is also in other."""
+        mine, theirs, _ = self.aligned(other)
+        return mine & theirs == mine
+
+    def difference(self, other):
+        """
+        Returns the sentence about the cells of this sentence that are
+        not in other, assuming other's cells are a subset of these.
+        """
+        mine, theirs, base = self.aligned(other)
+        return BitSentence.from_mask(
+            base, mine & ~theirs, self.count - other.count, self.width
+        )
+
+    def known_mines(self):
+        """
+        Returns the set of all cells in self.cells known to be mines.
+        """
+        if len(self) == self.count:
+            return self.cells
+        else:
+            return set()
+
+    def known_safes(self):
+        """
+        Returns the set of all cells in self.cells known to be safe.
+        """
+        if self.count == 0:
+            return self.cells
+        else:
+            return set()
+
+    def bit(self, cell):
+        """Returns the position of cell in the mask, or None if it is not there."""
+        position = cell[0] * self.width + cell[1] - self.offset
+        if position >= 0 and (self.mask >> position) & 1:
+            return position
+        return None
+
+    def mark_mine(self, cell):
+        """
+        Updates internal knowledge representation given the fact that
+        a cell is known to be a mine.
+        """
+        position = self.bit(cell)
+        if position is not None:
+            self.mask ^= 1 << position
+            self.count -= 1
+            self.normalize()
+
+    def mark_safe(self, cell):
+        """
+        Updates internal knowledge representation given the fact that
+        a cell is known to be safe.
+        """
+        position = self.bit(cell)
+        if position is not None:
+            self.mask ^= 1 << position
+            self.normalize()
+
+
+class Knowledge:
+    """
+    Set of sentences known to be true, indexed by the cells they mention.
+
+    Sentences change as cells are marked, so they are tracked by identity,
+    with a separate map from their content to the sentence for spotting
+    duplicates. Cells are indexed by the sentences' members(): the cells
+    themselves, or with width given (for BitSentence), flat indices.
+    """
+
+    def __init__(self, width=None):
+        self.width = width
+
+        # Maps id(sentence) to the sentence
+        self.sentences = {}
+
+        # Maps the content of each sentence (see Sentence.key) to the sentence
+        self.keys = {}
+
+        # Maps each cell's member key to the sentences containing it
+        self.by_cell = {}
+
+    def __iter__(self):
+        return iter(list(self.sentences.values()))
+
+    def __len__(self):
+        return len(self.sentences)
+
+    def __contains__(self, sentence):
+        return sentence.key() in self.keys
+
+    def add(self, sentence):
+        """
+        Adds a sentence unless it is already known or says nothing.
+        Returns True if the sentence was added.
+        """
+        key = sentence.key()
+        if key in self.keys or not (len(sentence) or sentence.count > 0):
+            return False
+        self.sentences[id(sentence)] = sentence
+        self.keys[key] = sentence
+        for member in sentence.members():
+            self.by_cell.setdefault(member, {})[id(sentence)] = sentence
+        return True
+
+    def mark(self, cell, mine):
+        """
+        Marks a cell as a mine or as safe in every sentence that mentions it.
+        Sentences that become empty or duplicate another one are dropped.
+        Returns the sentences that were changed and kept.
+        """
+        member = cell
+        if self.width is not None:
+            member = cell[0] * self.width + cell[1]
+        changed = []
+        for sentence in self.by_cell.pop(member, {}).values():
+            del self.keys[sentence.key()]
+            if mine:
+                sentence.mark_mine(cell)
+            else:
+                sentence.mark_safe(cell)
+
+            key = sentence.key()
+            if key in self.keys or not (len(sentence) or sentence.count > 0):
+                del self.sentences[id(sentence)]
+                for other in sentence.members():
+                    del self.by_cell[other][id(sentence)]
+            else:
+                self.keys[key] = sentence
+                changed.append(sentence)
+        return changed
+
+    def overlapping(self, sentence):
+        """Returns the other sentences sharing at least one cell with sentence."""
+        found = {}
+        for member in sentence.members():
+            found.update(self.by_cell.get(member, {}))
+        found.pop(id(sentence), None)
+        return list(found.values())
+
+
+class CellPool:
+    """
+    Set of cells that can add, remove and pick a random member in
+    constant time, by keeping the cells in a list plus a map from each
+    cell to its position in the list.
+    """
+
+    def __init__(self, cells=()):
+        self.cells = []
+        self.positions = {}
+        for cell in cells:
+            self.add(cell)
+
+    def __len__(self):
+        return len(self.cells)
+
+    def __contains__(self, cell):
+        return cell in self.positions
+
+    def __iter__(self):
+        return iter(self.cells)
+
+    def add(self, cell):
+        if cell not in self.positions:
+            self.positions[cell] = len(self.cells)
+            self.cells.append(cell)
+
+    def discard(self, cell):
+        """Removes a cell if present, moving the last cell into its place."""
+        position = self.positions.pop(cell, None)
+        if position is None:
+            return
+        last = self.cells.pop()
+        if position < len(self.cells):
+            self.cells[position] = last
+            self.positions[last] = position
+
+    def choice(self):
+        """Returns a random cell, or None if the pool is empty."""
+        if not self.cells:
+            return None
+        return random.choice(self.cells)
+
+
 class MinesweeperAI:
     """
     Minesweeper game player
     """
 
-    def __init__(self, height=8, width=8):
+    def __init__(
+        self,
+        height=8,
+        width=8,
+        mines=None,
+        complete=False,
+        time_budget=0.5,
+        compact=False,
+    ):
         # Set initial height and width
         self.height = height
         self.width = width
 
+        # Whether to store sentences as bitmasks (see BitSentence)
+        self.compact = compact
+
+        # Total number of mines on the board, if known
+        self.total_mines = mines
+
+        # Whether to solve sentence components exactly when the subset
+        # rule runs out of safe moves, and how long to spend doing it
+        self.complete = complete
+        self.time_budget = time_budget
+
         # Keep track of which cells have been clicked on
         self.moves_made = set()
 
@@ -160,8 +565,22 @@ class MinesweeperAI:
         self.mines = set()
         self.safes = set()
 
-        # List of sentences about the game known to be true
-        self.knowledge = []
+        # Sentences about the game known to be true
+        self.knowledge = Knowledge(self.width if compact else None)
+
+        # Cells that could still be picked by make_random_move
+        # (not yet chosen, not known to be mines) and by make_safe_move
+        # (known to be safe, not yet chosen)
+        self.unknown = CellPool(
+            (i, j) for i in range(self.height) for j in range(self.width)
+        )
+        self.safe_moves = CellPool()
+
+    def new_sentence(self, cells, count):
+        """Returns a sentence in the representation this AI uses."""
+        if self.compact:
+            return BitSentence(cells, count, self.width)
+        return Sentence(cells, count)
 
     def mark_mine(self, cell):
         """
@@ -169,8 +588,8 @@ class MinesweeperAI:
         to mark that cell as a mine as well.
         """
         self.mines.add(cell)
-        for sentence in self.knowledge:
-            sentence.mark_mine(cell)
+        self.unknown.discard(cell)
+        return self.knowledge.mark(cell, mine=True)
 
     def mark_safe(self, cell):
         """
@@ -178,8 +597,15 @@ class MinesweeperAI:
         to mark that cell as safe as well.
         """
         self.safes.add(cell)
-        for sentence in self.knowledge:
-            sentence.mark_safe(cell)
+        if cell not in self.moves_made:
+            self.safe_moves.add(cell)
+        return self.knowledge.mark(cell, mine=False)
+
+    def mark_move(self, cell):
+        """Marks a cell as a move that has been made."""
+        self.moves_made.add(cell)
+        self.unknown.discard(cell)
+        self.safe_moves.discard(cell)
 
     def add_knowledge(self, cell, count):
         """
@@ -197,10 +623,91 @@ class MinesweeperAI:
                if they can be inferred from existing knowledge
         """
         # 1) mark the cell as a move that has been made
-        self.moves_made.add(cell)
-        # 2) mark the cell as safe
-        self.mark_safe(cell)
+        self.mark_move(cell)
+        # 2) mark the cell as safe, remembering which sentences changed
+        agenda = deque(self.mark_safe(cell))
+
+        # 3) Create and add the new sentence to the AI's knowledge base
+        new_sentence = self.observation(cell, count)
+
+        # Only add non-empty sentences (e.g., if new_sentence_cells is empty and count is 0, it's trivial)
+        # Also avoid adding duplicates to prevent infinite loops or redundant work
+        if self.knowledge.add(new_sentence):
+            agenda.append(new_sentence)
+
+        # 4) and 5) Draw conclusions from the new and changed sentences
+        self.infer(agenda)
+
+        # Look harder only if there is no safe move left to make
+        if self.complete and not self.safe_moves:
+            self.deduce()
+
+    def deduce(self):
+        """
+        Finds every cell forced to be safe or a mine by solving each
+        component of connected sentences exactly, which catches conclusions
+        that need three or more sentences at once. Components that cannot be
+        solved within the time budget are skipped.
+        """
+        deadline = time.perf_counter() + self.time_budget
+        while True:
+            safes = set()
+            mines = set()
+            for component in constraints.components(self.knowledge):
+                try:
+                    cells, solutions = constraints.solve(component, deadline)
+                except constraints.Timeout:
+                    continue
+                if not solutions:
+                    continue
+
+                # A cell is forced if it is a mine in none or all of the placements
+                ways = sum(w for w, _ in solutions.values())
+                for j, cell in enumerate(cells):
+                    count = sum(counts[j] for _, counts in solutions.values())
+                    if count == 0:
+                        safes.add(cell)
+                    elif count == ways:
+                        mines.add(cell)
+
+            if not safes and not mines:
+                return
+
+            agenda = deque()
+            for cell in safes:
+                agenda.extend(self.mark_safe(cell))
+            for cell in mines:
+                agenda.extend(self.mark_mine(cell))
+            self.infer(agenda)
+
+    def add_knowledge_bulk(self, observations):
+        """
+        Adds many (cell, count) observations at once, such as every cell
+        opened by Minesweeper.reveal, and draws conclusions only once.
+        """
+        observations = list(observations)
+
+        # Mark every observed cell safe before building any sentence, so
+        # no sentence mentions a cell that was opened in the same batch
+        agenda = deque()
+        for cell, _ in observations:
+            self.mark_move(cell)
+            agenda.extend(self.mark_safe(cell))
+
+        for cell, count in observations:
+            new_sentence = self.observation(cell, count)
+            if self.knowledge.add(new_sentence):
+                agenda.append(new_sentence)
 
+        self.infer(agenda)
+        if self.complete and not self.safe_moves:
+            self.deduce()
+
+    def observation(self, cell, count):
+        """
+        Returns the sentence that a safe cell and its count of neighboring
+        mines tell us, leaving out neighbors already known to be safe or mines.
+        """
         # Collect neighbors for the new sentence and adjust count
         new_sentence_cells = set()
         mines_around_clicked_cell = 0
@@ -219,109 +726,52 @@ class MinesweeperAI:
                     if neighbor in self.mines:
                         mines_around_clicked_cell += 1
                     # If this neighbor is NOT a known safe or mine, it's an unknown cell for the new sentence
-                    elif neighbor not in self.safes:  # Already marked safe in step 2
+                    elif neighbor not in self.safes:  # Already marked safe by the caller
                         new_sentence_cells.add(neighbor)
 
-        # 3) Create and add the new sentence to the AI's knowledge base
         # The count for the new sentence is the original count minus the known mines among neighbors
-        new_sentence = Sentence(new_sentence_cells, count - mines_around_clicked_cell)
+        return self.new_sentence(new_sentence_cells, count - mines_around_clicked_cell)
 
-        # Only add non-empty sentences (e.g., if new_sentence_cells is empty and count is 0, it's trivial)
-        # Also avoid adding duplicates to prevent infinite loops or redundant work
-        if new_sentence not in self.knowledge and (
-            new_sentence.cells or new_sentence.count > 0
-        ):
-            self.knowledge.append(new_sentence)
-
-        # Loop to repeatedly apply deductions and inferences until no new knowledge is gained
-        something_changed = True
-        while something_changed:
-            something_changed = False
-
-            # Part 4: Mark any additional cells as safe or as mines
-            # based on the AI's knowledge base
-            newly_identified_safes = set()
-            newly_identified_mines = set()
-
-            # First, gather all known safes/mines from current sentences
-            # Iterate over a copy to avoid issues if knowledge base is modified
-            for sentence in list(self.knowledge):
-                newly_identified_safes.update(sentence.known_safes())
-                newly_identified_mines.update(sentence.known_mines())
-
-            # Now, apply these new findings to the AI's overall knowledge
-            # and update all sentences. This might change `self.knowledge`.
-            for safe_cell in newly_identified_safes:
-                if safe_cell not in self.safes:  # Only mark if truly new
-                    self.mark_safe(
-                        safe_cell
-                    )  # This will loop through self.knowledge and update sentences
-                    something_changed = True
-
-            for mine_cell in newly_identified_mines:
-                if mine_cell not in self.mines:  # Only mark if truly new
-                    self.mark_mine(
-                        mine_cell
-                    )  # This will loop through self.knowledge and update sentences
-                    something_changed = True
-
-            # Important: Remove redundant sentences (e.g., empty sentences with count 0)
-            # This helps keep the knowledge base clean and prevent infinite loops.
-            sentences_to_remove = set()
-            for sentence in list(self.knowledge):  # Iterate over a copy
-                if not sentence.cells and sentence.count == 0:
-                    sentences_to_remove.add(sentence)
-
-            for sentence in sentences_to_remove:
-                if (
-                    sentence in self.knowledge
-                ):  # Check if still present after modifications
-                    self.knowledge.remove(sentence)
-                    something_changed = True
-
-            # Part 5: Infer new sentences from existing knowledge (subset rule)
-            newly_inferred_sentences = []
-            # Iterate over a copy of the knowledge base to avoid modification issues
-            for s1 in list(self.knowledge):
-                for s2 in list(self.knowledge):
-                    # Don't compare a sentence to itself
-                    if s1 == s2:
+    def infer(self, agenda):
+        """
+        Marks cells as safe or as mines and adds inferred sentences,
+        starting from the sentences in agenda (new or just changed ones).
+
+        Any sentence changed or added along the way joins the agenda, so
+        only sentences near the latest change are ever looked at again.
+        """
+        while agenda:
+            sentence = agenda.popleft()
+
+            # Skip sentences dropped since they were queued
+            if id(sentence) not in self.knowledge.sentences:
+                continue
+
+            # Part 4: Mark cells as safe or as mines if the sentence settles them
+            safes = list(sentence.known_safes())
+            mines = list(sentence.known_mines())
+            if safes or mines:
+                for safe_cell in safes:
+                    if safe_cell not in self.safes:
+                        agenda.extend(self.mark_safe(safe_cell))
+                for mine_cell in mines:
+                    if mine_cell not in self.mines:
+                        agenda.extend(self.mark_mine(mine_cell))
+                continue
+
+            # Part 5: Infer new sentences with the subset rule, in both
+            # directions, against the sentences sharing a cell with this one
+            for other in self.knowledge.overlapping(sentence):
+                for subset, superset in ((sentence, other), (other, sentence)):
+                    if not subset.issubset(superset):
                         continue
 
-                    # If s1 is a subset of s2
-                    if s1.cells.issubset(s2.cells):
-                        # Calculate the new inferred sentence: s2 - s1 = s2.count - s1.count
-                        inferred_cells = s2.cells - s1.cells
-                        inferred_count = s2.count - s1.count
-
-                        # Ensure validity of the new sentence (e.g., count not negative)
-                        if (
-                            inferred_count < 0
-                        ):  # This implies a logical contradiction or error in prior steps
-                            # This case implies something is wrong, might want to raise an error
-                            # or skip, but should ideally not occur with correct logic.
-                            continue
-
-                        new_s = Sentence(inferred_cells, inferred_count)
-
-                        # Add the new sentence only if it's not already known
-                        # and if it's not a trivial empty sentence (e.g., set() = 0)
-                        if new_s not in self.knowledge and (
-                            new_s.cells or new_s.count > 0
-                        ):
-                            newly_inferred_sentences.append(new_s)
-                            something_changed = True  # We found a new sentence
-
-            # Add all newly inferred sentences to the knowledge base
-            for new_s in newly_inferred_sentences:
-                if (
-                    new_s not in self.knowledge
-                ):  # Double check to avoid duplicates if added by another part of loop
-                    self.knowledge.append(new_s)
-
-            # If no changes were made in this entire loop iteration, we are done
-            if not something_changed:
-                break
+                    # superset - subset = superset.count - subset.count
+                    if superset.count < subset.count:  # Would be a contradiction
+                        continue
+                    inferred = superset.difference(subset)
+                    if self.knowledge.add(inferred):
+                        agenda.append(inferred)
 
     def make_safe_move(self):
         """
@@ -331,12 +781,17 @@ class MinesweeperAI:
 
         This function may use the knowledge in self.mines, self.safes
         and self.moves_made, but should not modify any of those values.
+
+        Moves are drawn in constant time from the safe_moves pool, which
+        mark_safe and mark_move keep up to date. A drawn cell that
+        self.safes or self.moves_made no longer allow is dropped, but
+        cells added to self.safes directly are not seen.
         """
-        safe_moves = self.safes - self.moves_made
-        if safe_moves:
-            return random.choice(list(safe_moves))
-        else:
-            return None
+        while True:
+            cell = self.safe_moves.choice()
+            if cell is None or (cell in self.safes and cell not in self.moves_made):
+                return cell
+            self.safe_moves.discard(cell)
 
     def make_random_move(self):
         """
@@ -344,14 +799,131 @@ class MinesweeperAI:
         Should choose randomly among cells that:
             1) have not already been chosen, and
             2) are not known to be mines
+
+        Moves are drawn in constant time from the unknown pool, which
+        mark_mine and mark_move keep up to date, and checked against
+        self.moves_made and self.mines in the same way as make_safe_move.
+        """
+        while True:
+            cell = self.unknown.choice()
+            if cell is None or (cell not in self.moves_made and cell not in self.mines):
+                return cell
+            self.unknown.discard(cell)
+
+    def mine_probabilities(self, time_budget=None):
+        """
+        Returns a dictionary mapping every unknown cell to the probability
+        that it is a mine, given the AI's knowledge.
+
+        Sentences are split into independent components, and each component
+        is solved exactly by enumerating its consistent mine placements. If
+        the total number of mines is known, placements are weighted by the
+        number of ways to put the remaining mines in unconstrained cells.
+        Components that cannot be solved within time_budget seconds fall back
+        to the highest count/size ratio among their sentences.
         """
-        safe_moves = [
-            (i, j)
-            for i in range(self.height)
-            for j in range(self.width)
-            if (i, j) not in self.moves_made and (i, j) not in self.mines
+        unknown = {
+            cell
+            for cell in self.unknown
+            if cell not in self.safes
+            and cell not in self.moves_made
+            and cell not in self.mines
+        }
+        if time_budget is None:
+            time_budget = self.time_budget
+        deadline = time.perf_counter() + time_budget
+        probabilities = {}
+
+        # Solve each component, falling back to an estimate when out of time
+        solved = []
+        estimated = {}
+        for component in constraints.components(self.knowledge):
+            try:
+                solved.append(constraints.solve(component, deadline))
+            except constraints.Timeout:
+                for sentence in component:
+                    ratio = sentence.count / len(sentence)
+                    for cell in sentence.cells:
+                        estimated[cell] = max(estimated.get(cell, 0), ratio)
+        probabilities.update(estimated)
+        unconstrained = unknown - probabilities.keys()
+        for cells, _ in solved:
+            unconstrained.difference_update(cells)
+
+        # Number of mines not yet accounted for by known mines or estimates,
+        # with the estimated components' expected mines rounded to whole mines
+        remaining = None
+        if self.total_mines is not None:
+            expected = round(sum(estimated.values()))
+            remaining = max(0, self.total_mines - len(self.mines) - expected)
+
+        def weight(frontier_mines):
+            """Ways to place the other mines among the unconstrained cells."""
+            if remaining is None:
+                return 1
+            rest = remaining - frontier_mines
+            if rest < 0 or rest > len(unconstrained):
+                return 0
+            return math.comb(len(unconstrained), rest)
+
+        def convolve(distributions):
+            """Combines {mines: ways} distributions of independent components."""
+            total = {0: 1}
+            for distribution in distributions:
+                combined = {}
+                for a, x in total.items():
+                    for b, y in distribution.items():
+                        combined[a + b] = combined.get(a + b, 0) + x * y
+                total = combined
+            return total
+
+        distributions = [
+            {k: ways for k, (ways, _) in solutions.items()} for _, solutions in solved
         ]
-        if safe_moves:
-            return random.choice(safe_moves)
-        else:
+
+        # Probability of each cell in a solved component, given the others
+        for index, (cells, solutions) in enumerate(solved):
+            others = convolve(distributions[:index] + distributions[index + 1:])
+            mine_weight = [0] * len(cells)
+            total_weight = 0
+            for k, (ways, counts) in solutions.items():
+                w = sum(x * weight(k + t) for t, x in others.items())
+                total_weight += ways * w
+                for j, count in enumerate(counts):
+                    mine_weight[j] += count * w
+            for j, cell in enumerate(cells):
+                probabilities[cell] = (
+                    mine_weight[j] / total_weight if total_weight else 0.5
+                )
+
+        # Unconstrained cells share the expected number of leftover mines
+        if unconstrained:
+            if remaining is None:
+                frontier = [p for cell, p in probabilities.items() if cell in unknown]
+                density = sum(frontier) / len(frontier) if frontier else 0.5
+            else:
+                everything = convolve(distributions)
+                total_weight = sum(x * weight(t) for t, x in everything.items())
+                leftover = sum(
+                    x * weight(t) * (remaining - t) for t, x in everything.items()
+                )
+                density = 0.5
+                if total_weight:
+                    density = leftover / total_weight / len(unconstrained)
+            for cell in unconstrained:
+                probabilities[cell] = density
+
+        return {cell: probabilities[cell] for cell in unknown}
+
+    def make_guess_move(self, time_budget=None):
+        """
+        Returns the unknown cell least likely to be a mine, choosing
+        randomly between equally likely cells, or None if there is none.
+        """
+        probabilities = self.mine_probabilities(time_budget)
+        if not probabilities:
             return None
+        lowest = min(probabilities.values())
+        return random.choice(
+            sorted(cell for cell, p in probabilities.items() if p <= lowest + 1e-9)
+        )
@@ -1,6 +1,5 @@
 import pygame
 import sys
-import time
 
 from minesweeper import Minesweeper, MinesweeperAI
 
@@ -8,6 +7,9 @@ HEIGHT = 8
 WIDTH = 8
 MINES = 8
 
+# Frames per second; the loop sleeps between frames instead of spinning
+FPS = 30
+
 # Colors
 BLACK = (0, 0, 0)
 GRAY = (180, 180, 180)
@@ -17,6 +19,7 @@ WHITE = (255, 255, 255)
 pygame.init()
 size = width, height = 600, 400
 screen = pygame.display.set_mode(size)
+clock = pygame.time.Clock()
 
 # Fonts
 OPEN_SANS = "assets/fonts/OpenSans-Regular.ttf"
@@ -37,189 +40,266 @@ flag = pygame.transform.scale(flag, (cell_size, cell_size))
 mine = pygame.image.load("assets/images/mine.png")
 mine = pygame.transform.scale(mine, (cell_size, cell_size))
 
+# Rectangle of every cell, computed once
+cells = [
+    [
+        pygame.Rect(
+            board_origin[0] + j * cell_size,
+            board_origin[1] + i * cell_size,
+            cell_size,
+            cell_size,
+        )
+        for j in range(WIDTH)
+    ]
+    for i in range(HEIGHT)
+]
+
+
+def make_tile(icon=None):
+    """Renders a cell with an optional icon or glyph centered on it."""
+    tile = pygame.Surface((cell_size, cell_size))
+    rect = tile.get_rect()
+    pygame.draw.rect(tile, GRAY, rect)
+    pygame.draw.rect(tile, WHITE, rect, 3)
+    if icon is not None:
+        iconRect = icon.get_rect()
+        iconRect.center = rect.center
+        tile.blit(icon, iconRect)
+    return tile
+
+
+# Every cell looks like one of these, so render each just once
+tiles = {
+    "hidden": make_tile(),
+    "flag": make_tile(flag),
+    "mine": make_tile(mine),
+}
+for count in range(9):
+    tiles[count] = make_tile(smallFont.render(str(count), True, BLACK))
+
+
+def make_button(text, rect):
+    """Renders a white button with black text."""
+    button = pygame.Surface(rect.size)
+    button.fill(WHITE)
+    buttonText = mediumFont.render(text, True, BLACK)
+    buttonTextRect = buttonText.get_rect()
+    buttonTextRect.center = button.get_rect().center
+    button.blit(buttonText, buttonTextRect)
+    return button
+
+
+# Buttons
+aiButton = pygame.Rect(
+    (2 * width) // 3 + BOARD_PADDING,
+    height // 3 - 50,
+    width // 3 - BOARD_PADDING * 2,
+    50,
+)
+resetButton = pygame.Rect(
+    (2 * width) // 3 + BOARD_PADDING,
+    height // 3 + 20,
+    width // 3 - BOARD_PADDING * 2,
+    50,
+)
+playButton = pygame.Rect(width // 4, (3 * height) // 4, width // 2, 50)
+aiButtonSurface = make_button("AI Move", aiButton)
+resetButtonSurface = make_button("Reset", resetButton)
+playButtonSurface = make_button("Play Game", playButton)
+
+# Area under the "Won"/"Lost" text, cleared whenever the text changes
+statusRect = pygame.Rect((2 * width) // 3, (2 * height) // 3 - 25, width // 3, 50)
+statusTexts = {
+    text: mediumFont.render(text, True, WHITE) for text in ("", "Won", "Lost")
+}
+
+
+def draw_instructions():
+    screen.fill(BLACK)
+
+    # Title
+    title = largeFont.render("Play Minesweeper", True, WHITE)
+    titleRect = title.get_rect()
+    titleRect.center = (int(width / 2), 50)
+    screen.blit(title, titleRect)
+
+    # Rules
+    rules = [
+        "Click a cell to reveal it.",
+        "Right-click a cell to mark it as a mine.",
+        "Mark all mines successfully to win!",
+    ]
+    for i, rule in enumerate(rules):
+        line = smallFont.render(rule, True, WHITE)
+        lineRect = line.get_rect()
+        lineRect.center = (int(width / 2), 150 + 30 * i)
+        screen.blit(line, lineRect)
+
+    # Play game button
+    screen.blit(playButtonSurface, playButton)
+
+
+def draw_cell(cell):
+    """Draws one cell and returns the rectangle that changed."""
+    i, j = cell
+    if game.is_mine(cell) and lost:
+        tile = tiles["mine"]
+    elif cell in flags:
+        tile = tiles["flag"]
+    elif cell in revealed:
+        tile = tiles[game.nearby_mines(cell)]
+    else:
+        tile = tiles["hidden"]
+    screen.blit(tile, cells[i][j])
+    return cells[i][j]
+
+
+def draw_status(text):
+    """Draws the "Won"/"Lost" text and returns the rectangle that changed."""
+    pygame.draw.rect(screen, BLACK, statusRect)
+    status = statusTexts[text]
+    textRect = status.get_rect()
+    textRect.center = ((5 * width) // 6, (2 * height) // 3)
+    screen.blit(status, textRect)
+    return statusRect
+
+
+def draw_board():
+    screen.fill(BLACK)
+    for i in range(HEIGHT):
+        for j in range(WIDTH):
+            draw_cell((i, j))
+    screen.blit(aiButtonSurface, aiButton)
+    screen.blit(resetButtonSurface, resetButton)
+    draw_status(status)
+
+
+def cell_at(position):
+    """Returns the cell under a screen position, or None."""
+    j = (position[0] - board_origin[0]) // cell_size
+    i = (position[1] - board_origin[1]) // cell_size
+    if 0 <= i < HEIGHT and 0 <= j < WIDTH:
+        return (i, j)
+    return None
+
+
+def new_game():
+    return (
+        Minesweeper(height=HEIGHT, width=WIDTH, mines=MINES),
+        MinesweeperAI(height=HEIGHT, width=WIDTH, mines=MINES, complete=True),
+    )
+
+
 # Create game and AI agent
-game = Minesweeper(height=HEIGHT, width=WIDTH, mines=MINES)
-ai = MinesweeperAI(height=HEIGHT, width=WIDTH)
+game, ai = new_game()
 
 # Keep track of revealed cells, flagged cells, and if a mine was hit
 revealed = set()
 flags = set()
 lost = False
+status = ""
 
 # Show instructions initially
 instructions = True
 
+# Cells to redraw on the next frame, or everything if redraw_all is set
+dirty = set()
+redraw_all = True
+
 while True:
-    # Check if game quit
+    move = None
+    clicks = []
+
+    # Check if game quit, and collect mouse clicks
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
             sys.exit()
-
-    screen.fill(BLACK)
+        elif event.type == pygame.MOUSEBUTTONDOWN and event.button in (1, 3):
+            clicks.append(event)
 
     # Show game instructions
     if instructions:
-        # Title
-        title = largeFont.render("Play Minesweeper", True, WHITE)
-        titleRect = title.get_rect()
-        titleRect.center = (int(width / 2), 50)
-        screen.blit(title, titleRect)
-
-        # Rules
-        rules = [
-            "Click a cell to reveal it.",
-            "Right-click a cell to mark it as a mine.",
-            "Mark all mines successfully to win!",
-        ]
-        for i, rule in enumerate(rules):
-            line = smallFont.render(rule, True, WHITE)
-            lineRect = line.get_rect()
-            lineRect.center = (int(width / 2), 150 + 30 * i)
-            screen.blit(line, lineRect)
-
-        # Play game button
-        buttonRect = pygame.Rect(width // 4, (3 * height) // 4, width // 2, 50)
-        buttonText = mediumFont.render("Play Game", True, BLACK)
-        buttonTextRect = buttonText.get_rect()
-        buttonTextRect.center = buttonRect.center
-        pygame.draw.rect(screen, WHITE, buttonRect)
-        screen.blit(buttonText, buttonTextRect)
-
-        # Check if play button clicked
-        click, _, _ = pygame.mouse.get_pressed()
-        if click == 1:
-            mouse = pygame.mouse.get_pos()
-            if buttonRect.collidepoint(mouse):
+        for click in clicks:
+            if click.button == 1 and playButton.collidepoint(click.pos):
                 instructions = False
-                time.sleep(0.3)
-
-        pygame.display.flip()
+                redraw_all = True
+        if instructions and redraw_all:
+            draw_instructions()
+            pygame.display.flip()
+            redraw_all = False
+        clock.tick(FPS)
         continue
 
-    # Draw board
-    cells = []
-    for i in range(HEIGHT):
-        row = []
-        for j in range(WIDTH):
-            # Draw rectangle for cell
-            rect = pygame.Rect(
-                board_origin[0] + j * cell_size,
-                board_origin[1] + i * cell_size,
-                cell_size,
-                cell_size,
-            )
-            pygame.draw.rect(screen, GRAY, rect)
-            pygame.draw.rect(screen, WHITE, rect, 3)
-
-            # Add a mine, flag, or number if needed
-            if game.is_mine((i, j)) and lost:
-                screen.blit(mine, rect)
-            elif (i, j) in flags:
-                screen.blit(flag, rect)
-            elif (i, j) in revealed:
-                neighbors = smallFont.render(
-                    str(game.nearby_mines((i, j))), True, BLACK
-                )
-                neighborsTextRect = neighbors.get_rect()
-                neighborsTextRect.center = rect.center
-                screen.blit(neighbors, neighborsTextRect)
-
-            row.append(rect)
-        cells.append(row)
-
-    # AI Move button
-    aiButton = pygame.Rect(
-        (2 * width) // 3 + BOARD_PADDING,
-        height // 3 - 50,
-        width // 3 - BOARD_PADDING * 2,
-        50,
-    )
-    buttonText = mediumFont.render("AI Move", True, BLACK)
-    buttonRect = buttonText.get_rect()
-    buttonRect.center = aiButton.center
-    pygame.draw.rect(screen, WHITE, aiButton)
-    screen.blit(buttonText, buttonRect)
-
-    # Reset button
-    resetButton = pygame.Rect(
-        (2 * width) // 3 + BOARD_PADDING,
-        height // 3 + 20,
-        width // 3 - BOARD_PADDING * 2,
-        50,
-    )
-    buttonText = mediumFont.render("Reset", True, BLACK)
-    buttonRect = buttonText.get_rect()
-    buttonRect.center = resetButton.center
-    pygame.draw.rect(screen, WHITE, resetButton)
-    screen.blit(buttonText, buttonRect)
+    for click in clicks:
+        cell = cell_at(click.pos)
 
-    # Display text
-    text = "Lost" if lost else "Won" if game.mines == flags else ""
-    text = mediumFont.render(text, True, WHITE)
-    textRect = text.get_rect()
-    textRect.center = ((5 * width) // 6, (2 * height) // 3)
-    screen.blit(text, textRect)
-
-    move = None
-
-    left, _, right = pygame.mouse.get_pressed()
-
-    # Check for a right-click to toggle flagging
-    if right == 1 and not lost:
-        mouse = pygame.mouse.get_pos()
-        for i in range(HEIGHT):
-            for j in range(WIDTH):
-                if cells[i][j].collidepoint(mouse) and (i, j) not in revealed:
-                    if (i, j) in flags:
-                        flags.remove((i, j))
-                    else:
-                        flags.add((i, j))
-                    time.sleep(0.2)
-
-    elif left == 1:
-        mouse = pygame.mouse.get_pos()
+        # Right-click toggles a flag
+        if click.button == 3:
+            if cell is not None and not lost and cell not in revealed:
+                if cell in flags:
+                    flags.remove(cell)
+                else:
+                    flags.add(cell)
+                dirty.add(cell)
 
         # If AI button clicked, make an AI move
-        if aiButton.collidepoint(mouse) and not lost:
+        elif aiButton.collidepoint(click.pos):
+            if lost:
+                continue
             move = ai.make_safe_move()
             if move is None:
-                move = ai.make_random_move()
+                move = ai.make_guess_move()
                 if move is None:
+                    dirty.update(flags ^ ai.mines)
                     flags = ai.mines.copy()
                     print("No moves left to make.")
                 else:
-                    print("No known safe moves, AI making random move.")
+                    print("No known safe moves, AI making best guess.")
             else:
                 print("AI making safe move.")
-            time.sleep(0.2)
 
         # Reset game state
-        elif resetButton.collidepoint(mouse):
-            game = Minesweeper(height=HEIGHT, width=WIDTH, mines=MINES)
-            ai = MinesweeperAI(height=HEIGHT, width=WIDTH)
+        elif resetButton.collidepoint(click.pos):
+            game, ai = new_game()
             revealed = set()
             flags = set()
             lost = False
-            continue
+            move = None
+            redraw_all = True
 
         # User-made move
-        elif not lost:
-            for i in range(HEIGHT):
-                for j in range(WIDTH):
-                    if (
-                        cells[i][j].collidepoint(mouse)
-                        and (i, j) not in flags
-                        and (i, j) not in revealed
-                    ):
-                        move = (i, j)
-
-    # Make move and update AI knowledge
-    if move:
-        if game.is_mine(move):
-            lost = True
-        else:
-            nearby = game.nearby_mines(move)
-            revealed.add(move)
-            ai.add_knowledge(move, nearby)
-
-    pygame.display.flip()
+        elif cell is not None and not lost:
+            if cell not in flags and cell not in revealed:
+                move = cell
+
+        # Make move and update AI knowledge
+        if move:
+            if game.is_mine(move):
+                lost = True
+                dirty.update(game.mines)
+            else:
+                # Open the whole region around cells with no nearby mines
+                observations = game.reveal(move, revealed | flags)
+                opened = [cell for cell, _ in observations]
+                revealed.update(opened)
+                dirty.update(opened)
+                ai.add_knowledge_bulk(observations)
+            move = None
+
+    # Redraw only what changed since the last frame
+    text = "Lost" if lost else "Won" if game.mines == flags else ""
+    if redraw_all:
+        status = text
+        draw_board()
+        pygame.display.flip()
+    else:
+        changed = [draw_cell(cell) for cell in dirty]
+        if text != status:
+            status = text
+            changed.append(draw_status(status))
+        if changed:
+            pygame.display.update(changed)
+    dirty.clear()
+    redraw_all = False
+
+    clock.tick(FPS)
@@ -0,0 +1,171 @@
+"""
+Plays many seeded Minesweeper games with MinesweeperAI, without pygame,
+and reports how well and how fast the AI played.
+
+Usage: python simulate.py [-n GAMES] [--height H] [--width W] [--mines M]
+                          [--seed SEED] [--workers N] [--guess] [--complete]
+                          [--array] [--compact] [--flood]
+"""
+
+import argparse
+import functools
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from minesweeper import ArrayMinesweeper, Minesweeper, MinesweeperAI
+
+
+def play_game(
+    seed,
+    height,
+    width,
+    mines,
+    guess=False,
+    complete=False,
+    array=False,
+    compact=False,
+    flood=False,
+):
+    """
+    Plays one game, seeded so that the board and every random choice
+    can be replayed. Returns a dictionary of statistics about the game.
+
+    If guess is True, the AI makes its best guess instead of a random
+    move when it knows no safe move. If complete is True, the AI solves
+    sentence components exactly before giving up on finding a safe move.
+    If array is True, the board is an ArrayMinesweeper, and if compact is
+    True the AI stores its sentences as bitmasks. If flood is True, moves
+    open whole regions with no nearby mines, as in the pygame runner.
+    """
+    random.seed(seed)
+    board = ArrayMinesweeper if array else Minesweeper
+    game = board(height=height, width=width, mines=mines)
+    ai = MinesweeperAI(
+        height=height, width=width, mines=mines, complete=complete, compact=compact
+    )
+
+    stats = {
+        "seed": seed,
+        "won": False,
+        "moves": 0,
+        "guesses": 0,
+        "add_knowledge_times": [],
+        "knowledge_sizes": [],
+    }
+    safe_cells = height * width - mines
+
+    while len(ai.moves_made) < safe_cells:
+        move = ai.make_safe_move()
+        if move is None:
+            move = ai.make_guess_move() if guess else ai.make_random_move()
+            if move is None:
+                break
+            stats["guesses"] += 1
+        stats["moves"] += 1
+
+        if game.is_mine(move):
+            return stats
+
+        if flood:
+            observations = game.reveal(move, ai.moves_made)
+            start = time.perf_counter()
+            ai.add_knowledge_bulk(observations)
+        else:
+            nearby = game.nearby_mines(move)
+            start = time.perf_counter()
+            ai.add_knowledge(move, nearby)
+        stats["add_knowledge_times"].append(time.perf_counter() - start)
+        stats["knowledge_sizes"].append(len(ai.knowledge))
+
+    stats["won"] = len(ai.moves_made) == safe_cells
+    return stats
+
+
+def percentile(values, p):
+    """Returns the p-th percentile of values, using the nearest rank."""
+    if not values:
+        return 0
+    values = sorted(values)
+    rank = max(0, min(len(values) - 1, round(p / 100 * len(values)) - 1))
+    return values[rank]
+
+
+def summarize(label, values, scale=1, unit=""):
+    """Prints the mean and a few percentiles of values."""
+    mean = sum(values) / len(values) if values else 0
+    print(
+        f"{label}: mean {mean * scale:.2f}{unit}"
+        f", p50 {percentile(values, 50) * scale:.2f}{unit}"
+        f", p95 {percentile(values, 95) * scale:.2f}{unit}"
+        f", max {max(values, default=0) * scale:.2f}{unit}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless Minesweeper AI games")
+    parser.add_argument("-n", "--games", type=int, default=1000)
+    parser.add_argument("--height", type=int, default=8)
+    parser.add_argument("--width", type=int, default=8)
+    parser.add_argument("--mines", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument(
+        "--guess", action="store_true", help="make best guesses, not random moves"
+    )
+    parser.add_argument(
+        "--complete", action="store_true", help="solve sentence components exactly"
+    )
+    parser.add_argument(
+        "--array", action="store_true", help="use the NumPy-backed board"
+    )
+    parser.add_argument(
+        "--compact", action="store_true", help="store AI sentences as bitmasks"
+    )
+    parser.add_argument(
+        "--flood", action="store_true", help="open regions with no nearby mines"
+    )
+    args = parser.parse_args()
+
+    # Every game shares the same options and differs only by seed
+    play = functools.partial(
+        play_game,
+        height=args.height,
+        width=args.width,
+        mines=args.mines,
+        guess=args.guess,
+        complete=args.complete,
+        array=args.array,
+        compact=args.compact,
+        flood=args.flood,
+    )
+    seeds = range(args.seed, args.seed + args.games)
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        results = list(
+            executor.map(play, seeds, chunksize=max(1, args.games // 64))
+        )
+    elapsed = time.perf_counter() - start
+
+    wins = sum(result["won"] for result in results)
+    print(
+        f"{args.games} games on {args.height}x{args.width} with {args.mines} mines"
+        f" in {elapsed:.1f}s"
+    )
+    print(f"Win rate: {wins / args.games:.1%} ({wins}/{args.games})")
+    summarize("Moves per game", [result["moves"] for result in results])
+    summarize("Guesses per game", [result["guesses"] for result in results])
+    summarize(
+        "Time per add_knowledge",
+        [t for result in results for t in result["add_knowledge_times"]],
+        scale=1000,
+        unit="ms",
+    )
+    summarize(
+        "Knowledge base size",
+        [n for result in results for n in result["knowledge_sizes"]],
+    )
+
+
+if __name__ == "__main__":
+    main()